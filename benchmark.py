@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Playlist Generation Benchmark
+=============================
+
+Times each stage of the generation pipeline on synthetic catalogs of growing
+size and records wall time, peak memory and bytes produced per stage.
+
+Synthetic channels follow the group and HD distribution of the built-in
+channel list. Each stage runs several times; the median and the fastest time
+are kept. Results are saved as a JSON baseline; ``--compare`` checks a new
+run against a saved baseline and reports stages that got slower or use more
+memory than the threshold allows. A stage only counts as slower when even
+its fastest run is slower than the baseline median, and by more than a few
+milliseconds, so run-to-run noise is not reported.
+
+Usage:
+    python3 benchmark.py --sizes 1k,10k,100k -o baseline.json
+    python3 benchmark.py --sizes 1k,10k,100k --compare baseline.json --threshold 0.15
+    python3 benchmark.py --sizes 1M --stages render_playlists,channel_json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from tata_sky_core import (
+    CHANNELS_JSON,
+    ChannelCatalog,
+    create_channel_entry,
+    default_channels,
+    generate_categories_playlist,
+    generate_complete_playlist,
+    group_channels,
+    output_filenames,
+    render_playlists,
+    write_channel_json,
+)
+
+DEFAULT_SIZES = "1k,10k,100k"
+
+# Runs per stage
+DEFAULT_REPEAT = 5
+
+# Relative slowdown (or memory growth) reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Slowdowns smaller than this many seconds are never reported
+DEFAULT_MIN_SECONDS = 0.005
+
+def parse_size(value):
+    """Parse a catalog size such as "5000", "10k" or "1M"."""
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier, value = 1000, value[:-1]
+    elif value.endswith("m"):
+        multiplier, value = 1000000, value[:-1]
+    return int(float(value) * multiplier)
+
+def synthetic_catalog(size, seed=0):
+    """Build a catalog of ``size`` channels shaped like the built-in list.
+    
+    Groups are drawn with the same weights as the built-in channels and
+    each group keeps its own HD ratio. Ids and EPG numbers are unique.
+    """
+    rng = random.Random(seed)
+    templates = group_channels(default_channels())
+    groups = list(templates)
+    weights = [len(templates[group]) for group in groups]
+    hd_ratio = {group: sum(ch["hd"] for ch in members) / len(members) for group, members in templates.items()}
+    
+    catalog = ChannelCatalog()
+    for number, group in enumerate(rng.choices(groups, weights, k=size)):
+        template = rng.choice(templates[group])
+        hd = rng.random() < hd_ratio[group]
+        name = f"{template['name'].replace(' HD', '')} {number}" + (" HD" if hd else "")
+        catalog.add({
+            "name": name,
+            "id": f"ch{number}" + ("_hd" if hd else ""),
+            "logo": f"https://i.imgur.com/{number}{'hd' if hd else ''}.png",
+            "group": group,
+            "hd": hd,
+            "epg": 100 + number,
+        })
+    return catalog
+
+def stage_create_channel_entry(catalog, directory):
+    """Render every entry with create_channel_entry()."""
+    total = 0
+    for channel in catalog:
+        total += len(create_channel_entry(
+            channel.name, channel.id, channel.logo, channel.group, channel.hd, channel.epg
+        ))
+    return total
+
+def stage_complete_playlist(catalog, directory):
+    """Build the complete playlist string."""
+    return len(generate_complete_playlist(catalog)[0].encode("utf-8"))
+
+def stage_categories_playlist(catalog, directory):
+    """Build the categories playlist string."""
+    return len(generate_categories_playlist(catalog).encode("utf-8"))
+
+def stage_render_playlists(catalog, directory):
+    """Write all playlist variants with the single-pass renderer."""
+    render_playlists(catalog, directory)
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in output_filenames() if name != CHANNELS_JSON
+    )
+
+def stage_channel_json(catalog, directory):
+    """Write the channel data JSON file."""
+    path = os.path.join(directory, CHANNELS_JSON)
+    write_channel_json(path, catalog, {"total_channels": len(catalog)})
+    return os.path.getsize(path)
+
+def stage_catalog_export(catalog, directory):
+    """Write the JSON Lines and columnar exports with gzip copies."""
+    from catalog_export import EXPORT_FORMATS, write_export
+    
+    total = 0
+    for name, filename in EXPORT_FORMATS.items():
+        path = os.path.join(directory, filename)
+        write_export(path, catalog, name, compress=True)
+        total += os.path.getsize(path) + os.path.getsize(path + ".gz")
+    return total
+
+# Benchmarked stages, in run order
+STAGES = {
+    "create_channel_entry": stage_create_channel_entry,
+    "complete_playlist": stage_complete_playlist,
+    "categories_playlist": stage_categories_playlist,
+    "render_playlists": stage_render_playlists,
+    "channel_json": stage_channel_json,
+    "catalog_export": stage_catalog_export,
+}
+
+def run_stage(function, catalog, directory, repeat, measure_memory):
+    """Run one stage ``repeat`` times.
+    
+    Returns the median and best seconds, peak bytes and output bytes.
+    """
+    timings = []
+    output_bytes = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output_bytes = function(catalog, directory)
+            timings.append(time.perf_counter() - start)
+        
+        peak = None
+        if measure_memory:
+            # Separate run: tracing allocations distorts timings
+            tracemalloc.start()
+            try:
+                function(catalog, directory)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return {
+        "seconds": round(statistics.median(timings), 6),
+        "best_seconds": round(min(timings), 6),
+        "peak_bytes": peak,
+        "bytes": output_bytes,
+    }
+
+def run_benchmarks(sizes, stages, repeat=DEFAULT_REPEAT, measure_memory=True):
+    """Benchmark the given stages at each catalog size."""
+    results = {}
+    directory = tempfile.mkdtemp(prefix="tata_sky_bench_")
+    try:
+        for size in sizes:
+            catalog = synthetic_catalog(size)
+            results[str(size)] = {}
+            for name in stages:
+                result = run_stage(STAGES[name], catalog, directory, repeat, measure_memory)
+                results[str(size)][name] = result
+                peak = f"{result['peak_bytes'] / 1048576:9.1f} MiB" if result["peak_bytes"] is not None else "        -"
+                print(f"{size:>9}  {name:<22} {result['seconds']:10.4f} s  {peak}  "
+                      f"{result['bytes'] / 1048576:9.1f} MiB out")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, min_seconds=DEFAULT_MIN_SECONDS):
+    """Return regressions of ``current`` against ``baseline``.
+    
+    Each regression is ``(size, stage, metric, baseline_value, current_value)``
+    for time or peak memory growth beyond ``threshold`` (a fraction). The
+    fastest current run is compared with the baseline median, and slowdowns
+    of less than ``min_seconds`` are ignored.
+    """
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, result in stages.items():
+            reference = baseline["results"].get(size, {}).get(stage)
+            if reference is None:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                old, new = reference.get(metric), result.get(metric)
+                if metric == "seconds":
+                    new = result.get("best_seconds", new)
+                if not old or new is None or new <= old * (1 + threshold):
+                    continue
+                if metric == "seconds" and new - old < min_seconds:
+                    continue
+                regressions.append((size, stage, metric, old, new))
+    return regressions
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the playlist generation pipeline.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated catalog sizes, e.g. 1k,10k,1M (default: {DEFAULT_SIZES})")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="comma-separated stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"runs per stage (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the peak memory measurement run")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="save results as a JSON baseline")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare against a saved baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed relative growth before flagging (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help=f"ignore slowdowns smaller than this (default: {DEFAULT_MIN_SECONDS})")
+    args = parser.parse_args(argv)
+    
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    
+    current = run_benchmarks(sizes, stages, args.repeat, not args.no_memory)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"✓ Saved: {args.output}")
+    
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold, args.min_seconds)
+        for size, stage, metric, old, new in regressions:
+            print(f"✗ Regression: {stage} at {size} channels: {metric} {old} -> {new} "
+                  f"(+{(new / old - 1) * 100:.1f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold * 100:.0f}% against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Catalog Export Formats
+======================
+
+Compact alternatives to ``tata_sky_channels.json`` and lazy readers for them:
+
+- JSON Lines (``.jsonl``): one compact channel object per line, so consumers
+  can stream records without parsing the whole file.
+- Columnar (``.columns.json``): a header line followed by one JSON array per
+  attribute. Group names are stored once in the header and referenced by
+  index, and the HD flag is a string of 0/1 digits. Readers can load just the
+  columns they need; other column lines are skipped without being parsed.
+
+Either format can also be written gzip-compressed (``.gz``), and every reader
+accepts compressed files transparently::
+
+    {"format": "tata-sky-columnar", "version": 1, "count": 90, "columns": [...], "groups": [...]}
+    ["Star Plus HD","Star Plus",...]
+    ...
+
+Usage:
+    python3 catalog_export.py export --format columnar --gzip -o tata_sky_channels.columns.json
+    python3 catalog_export.py read tata_sky_channels.columns.json.gz --columns name,epg
+    python3 generate_tata_sky_m3u.py --export jsonl,columnar --gzip
+"""
+
+import argparse
+import gzip
+import json
+import sys
+
+from tata_sky_core import (
+    CHANNEL_FIELDS,
+    AtomicOutput,
+    Channel,
+    ChannelCatalog,
+    default_channels,
+    load_catalog,
+    report_commit,
+    write_batched,
+)
+
+JSONL_FILE = "tata_sky_channels.jsonl"
+COLUMNAR_FILE = "tata_sky_channels.columns.json"
+
+# Export format name -> default filename
+EXPORT_FORMATS = {"jsonl": JSONL_FILE, "columnar": COLUMNAR_FILE}
+
+COLUMNAR_FORMAT = "tata-sky-columnar"
+COLUMNAR_VERSION = 1
+
+# Compact separators: no spaces after "," and ":"
+COMPACT = (",", ":")
+
+def open_text(path):
+    """Open a catalog file for reading, decompressing ``.gz`` files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def write_lines(path, lines, compress=False, previous_digest=None):
+    """Atomically write encoded lines (plus a gzip copy with ``compress``).
+    
+    Returns ``(written, digest)``.
+    """
+    output = AtomicOutput(path, compress)
+    try:
+        write_batched(output, (line + "\n" for line in lines))
+    except BaseException:
+        output.discard()
+        raise
+    written = output.commit(previous_digest)
+    report_commit(output, written)
+    return written, output.hexdigest()
+
+def iter_jsonl_lines(channels):
+    encoder = json.JSONEncoder(separators=COMPACT, ensure_ascii=False)
+    for channel in channels:
+        yield encoder.encode({field: channel[field] for field in CHANNEL_FIELDS})
+
+def write_jsonl(path, channels, compress=False, previous_digest=None):
+    """Write the channels as JSON Lines. Returns ``(written, digest)``."""
+    return write_lines(path, iter_jsonl_lines(channels), compress, previous_digest)
+
+def iter_jsonl(path):
+    """Yield the channels of a JSON Lines export one at a time."""
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield Channel.from_dict(json.loads(line))
+
+def iter_columnar_lines(channels):
+    encoder = json.JSONEncoder(separators=COMPACT, ensure_ascii=False)
+    groups = {}
+    for channel in channels:
+        groups.setdefault(channel["group"], len(groups))
+    yield encoder.encode({
+        "format": COLUMNAR_FORMAT,
+        "version": COLUMNAR_VERSION,
+        "count": len(channels),
+        "columns": list(CHANNEL_FIELDS),
+        "groups": list(groups),
+    })
+    # One column in memory at a time
+    for field in CHANNEL_FIELDS:
+        if field == "group":
+            yield encoder.encode([groups[channel["group"]] for channel in channels])
+        elif field == "hd":
+            yield encoder.encode("".join("1" if channel["hd"] else "0" for channel in channels))
+        else:
+            yield encoder.encode([channel[field] for channel in channels])
+
+def write_columnar(path, channels, compress=False, previous_digest=None):
+    """Write the channels in the columnar layout. Returns ``(written, digest)``."""
+    return write_lines(path, iter_columnar_lines(channels), compress, previous_digest)
+
+def read_columnar_header(f, path):
+    header = json.loads(f.readline())
+    if header.get("format") != COLUMNAR_FORMAT or header.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Not a version {COLUMNAR_VERSION} columnar catalog: {path}")
+    return header
+
+def read_columns(path, columns=None):
+    """Load columns of a columnar export as ``{column: list}``.
+    
+    Only the requested ``columns`` (default: all) are decoded. Groups are
+    resolved to their names and the HD flag to bools.
+    """
+    wanted = set(CHANNEL_FIELDS if columns is None else columns)
+    unknown = wanted - set(CHANNEL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    
+    result = {}
+    with open_text(path) as f:
+        header = read_columnar_header(f, path)
+        for field in header["columns"]:
+            line = f.readline()
+            if field not in wanted:
+                continue
+            values = json.loads(line)
+            if field == "group":
+                names = [sys.intern(name) for name in header["groups"]]
+                values = [names[index] for index in values]
+            elif field == "hd":
+                values = [digit == "1" for digit in values]
+            result[field] = values
+            if len(result) == len(wanted):
+                break
+    return result
+
+def iter_columnar(path):
+    """Yield the channels of a columnar export as records."""
+    columns = read_columns(path)
+    for values in zip(*(columns[field] for field in CHANNEL_FIELDS)):
+        yield Channel(*values)
+
+def iter_exported_catalog(path):
+    """Yield the channels of a JSON Lines or columnar export, by file name."""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".columns.json"):
+        return iter_columnar(path)
+    if name.endswith(".jsonl"):
+        return iter_jsonl(path)
+    raise ValueError(f"Unknown catalog export format: {path}")
+
+def load_exported_catalog(path):
+    """Load a JSON Lines or columnar export into a ChannelCatalog."""
+    return ChannelCatalog(iter_exported_catalog(path))
+
+def write_export(path, channels, export_format, compress=False, previous_digest=None):
+    """Write the channels in a named export format. Returns ``(written, digest)``."""
+    writer = write_columnar if export_format == "columnar" else write_jsonl
+    return writer(path, channels, compress, previous_digest)
+
+def parse_formats(value):
+    """Parse a comma-separated list of export formats."""
+    formats = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"unknown export formats: {', '.join(unknown)} "
+                         f"(choose from {', '.join(EXPORT_FORMATS)})")
+    return formats
+
+def main(argv=None):
+    """Command line entry point for export and read."""
+    parser = argparse.ArgumentParser(description="Export the channel catalog in compact formats.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    
+    export_parser = commands.add_parser("export", help="write the catalog as JSON Lines or columns")
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="jsonl")
+    export_parser.add_argument("--catalog", metavar="PATH",
+                               help="channel catalog (default: the built-in channel list)")
+    export_parser.add_argument("--gzip", action="store_true",
+                               help="also write a gzip-compressed copy (PATH.gz)")
+    export_parser.add_argument("-o", "--output", metavar="PATH",
+                               help="output file (default: the format's standard filename)")
+    
+    read_parser = commands.add_parser("read", help="print channels or columns of an export")
+    read_parser.add_argument("path")
+    read_parser.add_argument("--columns", metavar="NAMES",
+                             help="comma-separated columns to load from a columnar export")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "export":
+        catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+        write_export(args.output or EXPORT_FORMATS[args.format], catalog, args.format, args.gzip)
+        return 0
+    
+    if args.columns:
+        columns = [name.strip() for name in args.columns.split(",") if name.strip()]
+        try:
+            values = read_columns(args.path, columns)
+        except ValueError as e:
+            parser.error(str(e))
+        for row in zip(*(values[name] for name in columns)):
+            print("\t".join("-" if value is None else str(value) for value in row))
+        return 0
+    
+    count = 0
+    for channel in iter_exported_catalog(args.path):
+        print(f"{channel.epg or '-':>5}  {channel.id:<24} {channel.name} ({channel.group})")
+        count += 1
+    print(f"{count} channels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
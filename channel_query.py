@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Channel Query Language
+======================
+
+A small filter language for selecting channels from the catalog::
+    
+    group:Sports and hd and epg:298..310
+    group:Regional* and not group:"Regional Tamil"
+    name:"Star Sports"* or id:colors_hd
+    (group:News or group:Kids) and sd
+
+Terms:
+    hd, sd                  HD or SD channels
+    group:VALUE             channels in a group (VALUE* matches a prefix)
+    name:VALUE              channel name equal to VALUE (VALUE* matches a prefix)
+    id:VALUE                a single channel id
+    epg:N, epg:N..M         channel number N, or N to M inclusive (N-M also works;
+                            N.. and ..M are open-ended)
+
+Terms combine with ``and``, ``or``, ``not`` and parentheses. Group and name
+matching ignores case. Values containing spaces or special characters are
+quoted.
+
+Queries compile to set operations over bitmaps (Python integers with one bit
+per channel) that are precomputed for groups and the HD flag, plus sorted
+arrays for channel numbers and names. Evaluating a query is a handful of
+big-integer operations and binary searches, with no per-channel Python work
+beyond collecting the matches.
+
+Usage:
+    python3 channel_query.py 'group:Sports and hd'
+    python3 channel_query.py 'epg:200..299' --catalog tata_sky_channels.json -o news.m3u
+    python3 generate_tata_sky_m3u.py --query 'group:Regional* and not group:"Regional Tamil"'
+"""
+
+import argparse
+import re
+import sys
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+
+from tata_sky_core import (
+    ChannelCatalog,
+    create_m3u_header,
+    default_channels,
+    iter_channel_entries,
+    load_catalog,
+    write_playlist,
+)
+
+TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|("(?:[^"\\]|\\.)*")|(\*)|(:)|([^\s():"*]+))')
+
+FIELDS = ("group", "name", "id", "epg")
+
+# Positions of the set bits in each byte value
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+NONZERO_BYTE_RE = re.compile(rb"[^\x00]")
+
+class QuerySyntaxError(ValueError):
+    """Raised when a query expression cannot be parsed."""
+
+def positions_to_bitmap(positions, size):
+    """Build a bitmap with the given positions set."""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+def bitmap_to_positions(bitmap, size):
+    """Return the set positions of a bitmap in ascending order."""
+    data = bitmap.to_bytes((size + 7) // 8, "little")
+    # Scanning for non-zero bytes happens in C; only matches reach Python
+    offsets = [match.start() for match in NONZERO_BYTE_RE.finditer(data)]
+    return [(offset << 3) + bit for offset in offsets for bit in BYTE_BITS[data[offset]]]
+
+class BitmapIndex:
+    """Bitmaps and sorted arrays over the catalog used to evaluate queries."""
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.size = size = len(catalog)
+        self.all = (1 << size) - 1
+        
+        # One pass over the catalog builds every bitmap
+        hd = bytearray((size + 7) // 8)
+        groups = {}
+        for position, channel in enumerate(catalog):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if channel.hd:
+                hd[byte] |= bit
+            key = channel.group.casefold()
+            data = groups.get(key)
+            if data is None:
+                data = groups[key] = bytearray(len(hd))
+            data[byte] |= bit
+        self.hd = int.from_bytes(hd, "little")
+        self.groups = {key: int.from_bytes(data, "little") for key, data in groups.items()}
+        self.group_names = sorted(self.groups)
+        
+        numbered = sorted((channel.epg, position) for position, channel in enumerate(catalog)
+                          if channel.epg is not None)
+        self.epg_values = array("q", (epg for epg, _ in numbered))
+        self.epg_positions = array("l", (position for _, position in numbered))
+        
+        named = sorted((channel.name.casefold(), position) for position, channel in enumerate(catalog))
+        self.names = [name for name, _ in named]
+        self.name_positions = array("l", (position for _, position in named))
+    
+    def group(self, value, prefix=False):
+        value = value.casefold()
+        if not prefix:
+            return self.groups.get(value, 0)
+        bitmap = 0
+        start = bisect_left(self.group_names, value)
+        for name in self.group_names[start:]:
+            if not name.startswith(value):
+                break
+            bitmap |= self.groups[name]
+        return bitmap
+    
+    def name(self, value, prefix=False):
+        value = value.casefold()
+        start = bisect_left(self.names, value)
+        if prefix:
+            end = bisect_left(self.names, value + "\U0010ffff")
+        else:
+            end = bisect_right(self.names, value)
+        return positions_to_bitmap(self.name_positions[start:end], self.size)
+    
+    def channel_id(self, value):
+        position = self.catalog.positions.get(value)
+        return 0 if position is None else 1 << position
+    
+    def epg(self, low, high):
+        start = bisect_left(self.epg_values, low)
+        end = bisect_right(self.epg_values, high)
+        return positions_to_bitmap(self.epg_positions[start:end], self.size)
+
+_indexes = weakref.WeakKeyDictionary()
+
+def get_index(catalog):
+    """Return the bitmap index of a catalog, building it on first use."""
+    index = _indexes.get(catalog)
+    if index is None or index.size != len(catalog):
+        index = _indexes[catalog] = BitmapIndex(catalog)
+    return index
+
+def tokenize(text):
+    """Split a query into (kind, value) tokens."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise QuerySyntaxError(f"unexpected character at {position}: {text[position:]!r}")
+        lparen, rparen, string, star, colon, word = match.groups()
+        if lparen:
+            tokens.append(("(", lparen))
+        elif rparen:
+            tokens.append((")", rparen))
+        elif string:
+            tokens.append(("value", re.sub(r"\\(.)", r"\1", string[1:-1])))
+        elif star:
+            tokens.append(("*", star))
+        elif colon:
+            tokens.append((":", colon))
+        else:
+            lowered = word.lower()
+            tokens.append((lowered, word) if lowered in ("and", "or", "not") else ("value", word))
+        position = match.end()
+    return tokens
+
+class Parser:
+    """Recursive-descent parser producing a tuple-based expression tree."""
+    
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+    
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+    
+    def take(self, kind):
+        if self.peek() != kind:
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "end of query"
+            raise QuerySyntaxError(f"expected {kind!r}, found {found!r}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token[1]
+    
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError("empty query")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"unexpected {self.tokens[self.position][1]!r}")
+        return node
+    
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == "or":
+            self.take("or")
+            node = ("or", node, self.parse_and())
+        return node
+    
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == "and":
+            self.take("and")
+            node = ("and", node, self.parse_not())
+        return node
+    
+    def parse_not(self):
+        if self.peek() == "not":
+            self.take("not")
+            return ("not", self.parse_not())
+        return self.parse_atom()
+    
+    def parse_atom(self):
+        if self.peek() == "(":
+            self.take("(")
+            node = self.parse_or()
+            self.take(")")
+            return node
+        
+        word = self.take("value")
+        if self.peek() != ":":
+            if word.lower() in ("hd", "sd"):
+                return (word.lower(),)
+            raise QuerySyntaxError(f"expected a field term like group:VALUE, found {word!r}")
+        field = word.lower()
+        if field not in FIELDS:
+            raise QuerySyntaxError(f"unknown field {word!r} (use one of {', '.join(FIELDS)})")
+        self.take(":")
+        value = self.take("value")
+        prefix = False
+        if self.peek() == "*":
+            self.take("*")
+            prefix = True
+        if field == "epg":
+            return ("epg",) + parse_epg_value(value)
+        if prefix and field == "id":
+            raise QuerySyntaxError("id does not support prefix matching")
+        return (field, value, prefix)
+
+def parse_epg_value(value):
+    """Parse "298", "298..310" or "298-310" into an inclusive range.
+    
+    One bound may be left out for an open-ended range: "300.." and "300-"
+    mean 300 and up, "..310" and "-310" mean up to 310.
+    """
+    low, separator, high = value.partition("..")
+    if not separator:
+        low, separator, high = value.partition("-")
+    if separator and not low and not high:
+        raise QuerySyntaxError(f"epg range {value!r} needs at least one bound")
+    try:
+        low = int(low) if low else float("-inf")
+        if not separator:
+            high = low
+        else:
+            high = int(high) if high else float("inf")
+    except ValueError:
+        raise QuerySyntaxError(f"invalid epg range {value!r}")
+    if low > high:
+        raise QuerySyntaxError(f"empty epg range {value!r}")
+    return low, high
+
+def compile_query(text):
+    """Parse a query into an expression tree (raises QuerySyntaxError)."""
+    return Parser(text).parse()
+
+def evaluate(node, index):
+    """Evaluate an expression tree to a bitmap."""
+    kind = node[0]
+    if kind == "and":
+        return evaluate(node[1], index) & evaluate(node[2], index)
+    if kind == "or":
+        return evaluate(node[1], index) | evaluate(node[2], index)
+    if kind == "not":
+        return index.all ^ evaluate(node[1], index)
+    if kind == "hd":
+        return index.hd
+    if kind == "sd":
+        return index.all ^ index.hd
+    if kind == "group":
+        return index.group(node[1], node[2])
+    if kind == "name":
+        return index.name(node[1], node[2])
+    if kind == "id":
+        return index.channel_id(node[1])
+    return index.epg(node[1], node[2])
+
+def query_positions(catalog, query):
+    """Return the catalog positions matching a query, in catalog order."""
+    node = compile_query(query) if isinstance(query, str) else query
+    index = get_index(catalog)
+    return bitmap_to_positions(evaluate(node, index), index.size)
+
+def query_channels(catalog, query):
+    """Return a new catalog with the channels matching a query."""
+    return ChannelCatalog(catalog[position] for position in query_positions(catalog, query))
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Select channels with a query expression.")
+    parser.add_argument("query", help="query expression, e.g. 'group:Sports and hd'")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="JSON channel catalog (default: the built-in channel list)")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="write the matching channels as an M3U playlist")
+    args = parser.parse_args(argv)
+    
+    catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+    try:
+        channels = query_channels(catalog, args.query)
+    except QuerySyntaxError as e:
+        parser.error(f"invalid query: {e}")
+    
+    if args.output:
+        write_playlist(args.output, [create_m3u_header("Tata Sky Custom Playlist")] +
+                       list(iter_channel_entries(channels)))
+    else:
+        for channel in channels:
+            print(f"{channel.epg or '-':>5}  {channel.id:<24} {channel.name} ({channel.group})")
+    print(f"{len(channels)} channels matched")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
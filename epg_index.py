@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+XMLTV EPG Index
+===============
+
+Streams an XMLTV guide (such as the ``tata_play.xml`` EPG referenced in the
+playlist header), keeps only the channels and programmes whose channel id is
+in the channel catalog, and builds a compact per-channel index for fast
+"now/next" lookups. The matching channels and programmes can be written to a
+trimmed XMLTV file next to the playlists.
+
+The guide is read with ``iterparse`` and every element is cleared once
+handled, so memory use does not grow with the size of the source file.
+
+Usage:
+    python3 epg_index.py tata_play.xml
+    python3 epg_index.py tata_play.xml --catalog tata_sky_channels.json -o tata_sky_epg.xml
+    python3 epg_index.py tata_play.xml --now-next starplus
+"""
+
+import argparse
+import calendar
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from tata_sky_core import AtomicOutput, ChannelCatalog, default_channels, load_catalog, report_output
+
+# Default file name for the trimmed guide
+EPG_FILE = "tata_sky_epg.xml"
+
+# "YYYYMMDDhhmmss +hhmm"; the time of day and the offset may be shortened or left out
+XMLTV_TIME_RE = re.compile(r"\s*(\d{8}(?:\d{2}){0,3})\s*([+-]\d{4})?\s*$")
+
+Programme = namedtuple("Programme", ["start", "stop", "title"])
+
+def parse_xmltv_time(value):
+    """Convert an XMLTV timestamp ("20251224013000 +0530") to epoch seconds.
+    
+    Raises ValueError if the value does not start with a date.
+    """
+    match = XMLTV_TIME_RE.match(value)
+    if match is None:
+        raise ValueError(f"Invalid XMLTV time: {value!r}")
+    digits, offset = match.groups()
+    digits = digits.ljust(14, "0")
+    timestamp = calendar.timegm((
+        int(digits[0:4]), int(digits[4:6]), int(digits[6:8]),
+        int(digits[8:10]), int(digits[10:12]), int(digits[12:14]),
+    ))
+    if offset:
+        seconds = int(offset[1:3]) * 3600 + int(offset[3:5]) * 60
+        timestamp -= seconds if offset[0] == "+" else -seconds
+    return timestamp
+
+class ChannelSchedule:
+    """Time-sorted programmes of one channel, stored in flat arrays."""
+    
+    __slots__ = ("starts", "stops", "titles")
+    
+    def __init__(self):
+        self.starts = array("q")
+        self.stops = array("q")
+        self.titles = []
+    
+    def add(self, start, stop, title):
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.titles.append(title)
+    
+    def sort(self):
+        """Sort programmes by start time (guides are usually sorted already)."""
+        starts = self.starts
+        if all(starts[i] <= starts[i + 1] for i in range(len(starts) - 1)):
+            return
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        self.starts = array("q", (starts[i] for i in order))
+        self.stops = array("q", (self.stops[i] for i in order))
+        self.titles = [self.titles[i] for i in order]
+    
+    def programme(self, index):
+        return Programme(self.starts[index], self.stops[index], self.titles[index])
+    
+    def __len__(self):
+        return len(self.starts)
+
+class EPGIndex:
+    """Per-channel programme schedules with now/next lookups."""
+    
+    def __init__(self):
+        self.schedules = {}
+        self.channel_names = {}
+        self.skipped = 0
+    
+    def add(self, channel_id, start, stop, title):
+        schedule = self.schedules.get(channel_id)
+        if schedule is None:
+            schedule = self.schedules[channel_id] = ChannelSchedule()
+        schedule.add(start, stop, title)
+    
+    def finish(self):
+        """Sort every schedule once all programmes have been added."""
+        for schedule in self.schedules.values():
+            schedule.sort()
+    
+    def now_next(self, channel_id, when=None):
+        """Return ``(now, next)`` programmes for a channel at ``when``.
+        
+        ``when`` is epoch seconds (default: current time). Either value is
+        None when there is no such programme.
+        """
+        schedule = self.schedules.get(channel_id)
+        if schedule is None:
+            return None, None
+        if when is None:
+            when = time.time()
+        position = bisect_right(schedule.starts, when)
+        current = None
+        if position and schedule.stops[position - 1] > when:
+            current = schedule.programme(position - 1)
+        upcoming = schedule.programme(position) if position < len(schedule) else None
+        return current, upcoming
+    
+    def __len__(self):
+        return sum(len(schedule) for schedule in self.schedules.values())
+
+def quote_attribute(value):
+    """Quote an XML attribute value."""
+    return '"' + value.replace("&", "&amp;").replace('"', "&quot;").replace("<", "&lt;") + '"'
+
+def write_element(output, element):
+    """Serialize one element to the trimmed guide."""
+    element.tail = None
+    output.write(b"  " + ET.tostring(element, encoding="unicode").encode("utf-8") + b"\n")
+
+def build_epg_index(source, channel_ids, output_path=None):
+    """Stream an XMLTV file into an index of the given channel ids.
+    
+    When ``output_path`` is given, the matching ``<channel>`` and
+    ``<programme>`` elements are also written to a trimmed XMLTV file.
+    Programmes with a missing or invalid start or stop time are skipped
+    and counted in the index's ``skipped``.
+    """
+    channel_ids = set(channel_ids)
+    index = EPGIndex()
+    output = AtomicOutput(output_path) if output_path else None
+    root = None
+    
+    try:
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                    if output is not None:
+                        attributes = "".join(
+                            f" {key}={quote_attribute(value)}" for key, value in root.attrib.items()
+                        )
+                        output.write(
+                            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                            f'<!DOCTYPE tv SYSTEM "xmltv.dtd">\n<tv{attributes}>\n'.encode("utf-8")
+                        )
+                continue
+            
+            if element.tag == "channel":
+                channel_id = element.get("id")
+                if channel_id in channel_ids:
+                    index.channel_names[channel_id] = element.findtext("display-name", channel_id)
+                    if output is not None:
+                        write_element(output, element)
+            elif element.tag == "programme":
+                channel_id = element.get("channel")
+                if channel_id in channel_ids:
+                    start = element.get("start") or ""
+                    try:
+                        times = parse_xmltv_time(start), parse_xmltv_time(element.get("stop") or start)
+                    except ValueError:
+                        index.skipped += 1
+                    else:
+                        index.add(channel_id, *times, element.findtext("title", ""))
+                        if output is not None:
+                            write_element(output, element)
+            else:
+                continue
+            # Drop handled elements so the tree never grows
+            root.clear()
+        
+        if output is not None:
+            output.write(b"</tv>\n")
+            output.commit()
+            report_output(output_path, True)
+    except BaseException:
+        if output is not None:
+            output.discard()
+        raise
+    
+    index.finish()
+    return index
+
+def format_time(timestamp):
+    """Format epoch seconds as local HH:MM."""
+    return time.strftime("%H:%M", time.localtime(timestamp))
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Filter an XMLTV guide to the channel catalog.")
+    parser.add_argument("source", help="XMLTV file to read")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="JSON channel catalog (default: the built-in channel list)")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="write the trimmed guide to PATH")
+    parser.add_argument("--now-next", nargs="*", metavar="ID",
+                        help="print now/next for these channel ids (default: all)")
+    args = parser.parse_args(argv)
+    
+    catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+    index = build_epg_index(args.source, catalog.by_id, args.output)
+    print(f"Programmes kept: {len(index)} across {len(index.schedules)} channels")
+    if index.skipped:
+        print(f"Skipped {index.skipped} programmes with a missing or invalid time")
+    
+    if args.now_next is not None:
+        for channel_id in args.now_next or sorted(index.schedules):
+            current, upcoming = index.now_next(channel_id)
+            now_text = f"{format_time(current.start)} {current.title}" if current else "-"
+            next_text = f"{format_time(upcoming.start)} {upcoming.title}" if upcoming else "-"
+            print(f"{channel_id}: now {now_text} | next {next_text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Channel Logo Cache
+==================
+
+Mirrors the channel logos referenced by the catalog into a local,
+content-addressed cache and rewrites each channel's ``logo`` to point at the
+local copy, so players no longer fetch every logo from the original host on
+a cold start.
+
+Logos are downloaded concurrently by a thread pool sharing one pooled
+``requests`` session. Cached logos are revalidated with conditional requests
+(``If-None-Match`` / ``If-Modified-Since``), and identical images are stored
+once, under the SHA-256 of their content.
+
+Usage:
+    python3 logo_cache.py logos/
+    python3 generate_tata_sky_m3u.py --mirror-logos logos/ --logo-base-url https://example.com/logos
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import posixpath
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tata_sky_core import AtomicOutput, Channel, ChannelCatalog, default_channels, load_catalog
+
+# Index of mirrored URLs, kept inside the cache directory
+INDEX_FILE = "index.json"
+
+# Concurrent downloads (and pooled connections per host)
+DEFAULT_WORKERS = 16
+
+# Seconds to wait for a logo server
+REQUEST_TIMEOUT = 15
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+    "image/x-icon": ".ico",
+}
+
+def create_session(pool_size=DEFAULT_WORKERS):
+    """Create a requests session with a connection pool sized for the workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+def logo_extension(url, content_type):
+    """Pick a file extension from the response type, falling back to the URL."""
+    content_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if content_type in CONTENT_TYPE_EXTENSIONS:
+        return CONTENT_TYPE_EXTENSIONS[content_type]
+    extension = posixpath.splitext(urlsplit(url).path)[1].lower()
+    return extension if extension in CONTENT_TYPE_EXTENSIONS.values() else ""
+
+class LogoCache:
+    """Content-addressed logo store with an index of mirrored URLs.
+    
+    The index maps each source URL to the cached file (relative to the
+    cache directory), its SHA-256 and the validators needed to revalidate
+    it.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+    
+    def path(self, record):
+        """Return the on-disk path of a cached logo."""
+        return os.path.join(self.directory, *record["path"].split("/"))
+    
+    def fetch(self, session, url):
+        """Download or revalidate one logo. Returns ``(status, record)``.
+        
+        ``status`` is "fetched", "unchanged" or "not-modified". Runs in
+        worker threads, so it only writes logo files, never the index.
+        """
+        record = self.index.get(url)
+        headers = {}
+        if record and os.path.exists(self.path(record)):
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+        
+        response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and headers:
+            return "not-modified", record
+        response.raise_for_status()
+        
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        relative_path = f"{digest[:2]}/{digest}{logo_extension(url, response.headers.get('Content-Type'))}"
+        new_record = {
+            "path": relative_path,
+            "sha256": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        
+        target = self.path(new_record)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            output = AtomicOutput(target)
+            output.write(content)
+            output.commit()
+        status = "unchanged" if record and record.get("sha256") == digest else "fetched"
+        return status, new_record
+    
+    def mirror(self, urls, workers=DEFAULT_WORKERS, session=None):
+        """Mirror logos concurrently and save the index.
+        
+        Returns a dict of counts per status, plus "failed". URLs that fail
+        keep their previous cache entry, if any.
+        """
+        urls = sorted(set(url for url in urls if url))
+        counts = {"fetched": 0, "unchanged": 0, "not-modified": 0, "failed": 0}
+        own_session = session is None
+        if own_session:
+            session = create_session(workers)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self.fetch, session, url): url for url in urls}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        status, record = future.result()
+                    except (requests.RequestException, OSError) as e:
+                        counts["failed"] += 1
+                        print(f"✗ Logo failed: {url} ({e})")
+                        continue
+                    counts[status] += 1
+                    self.index[url] = record
+        finally:
+            if own_session:
+                session.close()
+        
+        self.save_index()
+        return counts
+    
+    def save_index(self):
+        """Atomically write the URL index."""
+        output = AtomicOutput(os.path.join(self.directory, INDEX_FILE))
+        output.write(json.dumps(self.index, indent=2, sort_keys=True).encode("utf-8"))
+        output.commit()
+    
+    def local_url(self, url, base_url=None, relative_to=None):
+        """Return the local location of a mirrored logo, or None if not cached.
+        
+        With ``base_url`` the cache-relative path is appended to it. Otherwise
+        the cache file path is returned relative to the ``relative_to``
+        directory (where the playlist is written), or as an absolute
+        ``file://`` URL.
+        """
+        record = self.index.get(url)
+        if record is None:
+            return None
+        if base_url:
+            return f"{base_url.rstrip('/')}/{record['path']}"
+        path = self.path(record)
+        if relative_to is None:
+            return pathlib.Path(os.path.abspath(path)).as_uri()
+        return os.path.relpath(path, relative_to).replace(os.sep, "/")
+
+def mirror_logos(catalog, directory, base_url=None, workers=DEFAULT_WORKERS, session=None,
+                 relative_to=None):
+    """Mirror every catalog logo and point the channels at the local copies.
+    
+    Without ``base_url``, pass the playlist directory as ``relative_to``
+    to get relative paths (see ``LogoCache.local_url``). Channels whose
+    logo could not be mirrored keep their original URL. Returns the
+    per-status counts from ``LogoCache.mirror``.
+    """
+    cache = LogoCache(directory)
+    counts = cache.mirror((channel.logo for channel in catalog), workers, session)
+    for channel in catalog:
+        local = cache.local_url(channel.logo, base_url, relative_to)
+        if local is not None:
+            channel.logo = local
+    return counts
+
+def relink_logos(catalog, original_logos, directory, relative_to):
+    """Return a copy of a mirrored catalog with logo paths relative to another directory.
+    
+    ``original_logos`` maps channel ids to the logo URLs they had before
+    ``mirror_logos`` rewrote them.
+    """
+    cache = LogoCache(directory)
+    channels = []
+    for channel in catalog:
+        original = original_logos.get(channel.id, channel.logo)
+        local = cache.local_url(original, relative_to=relative_to)
+        channels.append(Channel(channel.name, channel.id, original if local is None else local,
+                                channel.group, channel.hd, channel.epg))
+    return ChannelCatalog(channels)
+
+def format_counts(counts):
+    """Summarize mirror counts on one line."""
+    return ", ".join(f"{count} {status}" for status, count in counts.items())
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Mirror channel logos into a local cache.")
+    parser.add_argument("directory", help="cache directory")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="JSON channel catalog (default: the built-in channel list)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent downloads (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args(argv)
+    
+    catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+    counts = LogoCache(args.directory).mirror((channel.logo for channel in catalog), args.workers)
+    print(f"Logos: {format_counts(counts)}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+M3U Playlist Parser
+===================
+
+Streaming parser for the M3U playlists written by ``generate_tata_sky_m3u.py``
+(and other extended-M3U playlists), with merge and diff operations keyed by
+``tvg-id``.
+
+Playlists are memory-mapped and entries are yielded lazily, so even very large
+playlists are read without loading them into Python objects all at once.
+Merging and diffing are single linear passes over the inputs.
+
+Usage:
+    python3 m3u_parser.py diff old.m3u new.m3u
+    python3 m3u_parser.py merge -o merged.m3u first.m3u second.m3u
+"""
+
+import argparse
+import hashlib
+import mmap
+import re
+import sys
+
+from tata_sky_core import AtomicOutput
+
+# key="value" pairs on #EXTINF and #EXTM3U lines
+ATTRIBUTE_RE = re.compile(rb'([A-Za-z0-9_-]+)="([^"]*)"')
+
+# group-title of the playlist information entry written by create_m3u_header()
+INFO_GROUP = "INFO"
+
+class M3UEntry:
+    """A single playlist entry: its #EXTINF line, options and stream URL."""
+    
+    __slots__ = ("duration", "attributes", "title", "options", "url", "start", "end")
+    
+    def __init__(self, duration, attributes, title, start):
+        self.duration = duration
+        self.attributes = attributes
+        self.title = title
+        self.options = []
+        self.url = None
+        self.start = start
+        self.end = start
+    
+    @property
+    def tvg_id(self):
+        return self.attributes.get("tvg-id")
+    
+    @property
+    def tvg_name(self):
+        return self.attributes.get("tvg-name")
+    
+    @property
+    def tvg_logo(self):
+        return self.attributes.get("tvg-logo")
+    
+    @property
+    def group_title(self):
+        return self.attributes.get("group-title")
+    
+    @property
+    def tvg_chno(self):
+        return self.attributes.get("tvg-chno")
+    
+    @property
+    def key(self):
+        """Merge/diff key: the tvg-id, or the name for entries without one."""
+        tvg_id = self.tvg_id
+        if tvg_id:
+            return tvg_id
+        return "name:" + (self.tvg_name or self.title)
+    
+    @property
+    def is_channel(self):
+        """False for the playlist INFO entry and category headers.
+        
+        Those carry ``group-title="INFO"``, or have no stream URL and neither
+        a tvg-id nor a tvg-name. Plain ``#EXTINF:-1,Name`` entries from other
+        playlists still count as channels as long as they have a URL.
+        """
+        if self.group_title == INFO_GROUP:
+            return False
+        return bool(self.url or self.tvg_id or self.tvg_name)
+    
+    def __repr__(self):
+        return f"M3UEntry({self.key!r}, group={self.group_title!r})"
+
+def parse_attributes(data):
+    """Parse key="value" attributes from a bytes line into a str dict."""
+    return {
+        key.decode("utf-8"): value.decode("utf-8")
+        for key, value in ATTRIBUTE_RE.findall(data)
+    }
+
+def parse_extinf(line, start):
+    """Parse an #EXTINF line (bytes, without newline) into an entry."""
+    body = line[len(b"#EXTINF:"):]
+    
+    # The title follows the first comma after the last attribute
+    attributes_end = 0
+    for match in ATTRIBUTE_RE.finditer(body):
+        attributes_end = match.end()
+    comma = body.find(b",", attributes_end)
+    if comma == -1:
+        head, title = body, b""
+    else:
+        head, title = body[:comma], body[comma + 1:]
+    
+    duration = head.split(None, 1)[0] if head.strip() else b"-1"
+    try:
+        duration = int(duration)
+    except ValueError:
+        duration = -1
+    return M3UEntry(duration, parse_attributes(head), title.strip().decode("utf-8"), start)
+
+def iter_lines(buffer):
+    """Yield ``(offset, line)`` for each line of a bytes-like buffer."""
+    position = 0
+    size = len(buffer)
+    while position < size:
+        newline = buffer.find(b"\n", position)
+        if newline == -1:
+            newline = size
+        yield position, buffer[position:newline].rstrip(b"\r")
+        position = newline + 1
+
+def iter_entries(buffer, channels_only=True):
+    """Yield entries from a playlist held in a bytes-like buffer.
+    
+    Each entry records its ``start``/``end`` byte offsets so callers can
+    copy the raw entry without re-serializing it. Unless ``channels_only``
+    is False, entries that are not channels (see ``M3UEntry.is_channel``)
+    are skipped.
+    """
+    entries = _iter_all_entries(buffer)
+    if channels_only:
+        return (entry for entry in entries if entry.is_channel)
+    return entries
+
+def _iter_all_entries(buffer):
+    entry = None
+    for offset, line in iter_lines(buffer):
+        if not line.strip():
+            continue
+        end = offset + len(line)
+        if line.startswith(b"#EXTINF:"):
+            if entry is not None:
+                yield entry
+            entry = parse_extinf(line, offset)
+            entry.end = end
+        elif entry is None:
+            # #EXTM3U header and anything else before the first entry
+            continue
+        elif line.startswith(b"#EXTVLCOPT:"):
+            entry.options.append(line[len(b"#EXTVLCOPT:"):].decode("utf-8"))
+            entry.end = end
+        elif line.startswith(b"#"):
+            entry.end = end
+        else:
+            entry.url = line.strip().decode("utf-8")
+            entry.end = end
+            yield entry
+            entry = None
+    if entry is not None:
+        yield entry
+
+class M3UPlaylist:
+    """A memory-mapped playlist file. Use as a context manager.
+    
+    Iterating yields the channel entries, or every entry with
+    ``channels_only=False``.
+    """
+    
+    def __init__(self, path, channels_only=True):
+        self.path = path
+        self.channels_only = channels_only
+        self._file = open(path, "rb")
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self.buffer = b""
+    
+    def header_line(self):
+        """Return the raw #EXTM3U line, or a bare one if missing."""
+        for _, line in iter_lines(self.buffer):
+            if line.startswith(b"#EXTM3U"):
+                return line
+            if line.strip():
+                break
+        return b"#EXTM3U"
+    
+    def header(self):
+        """Return the attributes of the #EXTM3U line (e.g. x-tvg-url)."""
+        return parse_attributes(self.header_line())
+    
+    def __iter__(self):
+        return iter_entries(self.buffer, self.channels_only)
+    
+    def raw(self, entry):
+        """Return the raw bytes of an entry from this playlist."""
+        return self.buffer[entry.start:entry.end]
+    
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_m3u(path, channels_only=True):
+    """Lazily yield the entries of an M3U playlist file."""
+    with M3UPlaylist(path, channels_only) as playlist:
+        yield from playlist
+
+def entry_digest(playlist, entry):
+    """Hash an entry's raw content, ignoring line-ending differences."""
+    return hashlib.sha1(playlist.raw(entry).replace(b"\r\n", b"\n")).digest()
+
+def diff_playlists(old_path, new_path, channels_only=True):
+    """Compare two playlists by entry key.
+    
+    Returns a dict with ``added``, ``removed`` and ``changed`` lists of
+    keys. Only a digest per old entry is kept in memory.
+    """
+    with M3UPlaylist(old_path, channels_only) as old:
+        old_digests = {entry.key: entry_digest(old, entry) for entry in old}
+    
+    added, changed = [], []
+    with M3UPlaylist(new_path, channels_only) as new:
+        for entry in new:
+            key = entry.key
+            digest = old_digests.pop(key, None)
+            if digest is None:
+                added.append(key)
+            elif digest != entry_digest(new, entry):
+                changed.append(key)
+    return {"added": added, "removed": list(old_digests), "changed": changed}
+
+def merge_playlists(paths, output_path, channels_only=True):
+    """Merge playlists into one, keyed by entry key.
+    
+    Entries keep the position where their key first appeared; when a key
+    occurs more than once, the last occurrence's content wins. The
+    #EXTM3U header of the first playlist is kept. The output is written
+    atomically, so it may also be one of the inputs. Returns the number of
+    entries written.
+    """
+    playlists = [M3UPlaylist(path, channels_only) for path in paths]
+    output = AtomicOutput(output_path)
+    try:
+        # Only offsets are kept; entry bytes are copied from the maps on output
+        locations = {}
+        for index, playlist in enumerate(playlists):
+            for entry in playlist:
+                locations[entry.key] = (index, entry.start, entry.end)
+        
+        output.write(playlists[0].header_line() + b"\n" if playlists else b"#EXTM3U\n")
+        for index, start, end in locations.values():
+            output.write(playlists[index].buffer[start:end])
+            output.write(b"\n")
+    except BaseException:
+        output.discard()
+        raise
+    finally:
+        for playlist in playlists:
+            playlist.close()
+    # Replace the output only once no input is mapped any more
+    output.commit()
+    return len(locations)
+
+def main(argv=None):
+    """Command line entry point for diff and merge."""
+    parser = argparse.ArgumentParser(description="Diff or merge M3U playlists by tvg-id.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    
+    diff_parser = commands.add_parser("diff", help="show entries added, removed or changed")
+    diff_parser.add_argument("--all-entries", action="store_true",
+                             help="also compare the INFO entry and category headers")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    
+    merge_parser = commands.add_parser("merge", help="merge playlists, later files win")
+    merge_parser.add_argument("-o", "--output", required=True, metavar="PATH")
+    merge_parser.add_argument("--all-entries", action="store_true",
+                              help="also copy the INFO entry and category headers")
+    merge_parser.add_argument("playlists", nargs="+")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "diff":
+        result = diff_playlists(args.old, args.new, not args.all_entries)
+        for key in result["added"]:
+            print(f"+ {key}")
+        for key in result["removed"]:
+            print(f"- {key}")
+        for key in result["changed"]:
+            print(f"~ {key}")
+        print(f"{len(result['added'])} added, {len(result['removed'])} removed, "
+              f"{len(result['changed'])} changed")
+        return 1 if any(result.values()) else 0
+    
+    count = merge_playlists(args.playlists, args.output, not args.all_entries)
+    print(f"✓ Saved: {args.output} ({count} entries)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
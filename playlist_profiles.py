@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Playlist Profiles
+=================
+
+Generates one full set of playlists (complete, HD, SD, categories and channel
+JSON) per profile, where each profile is a channel filter declared in a JSON
+config file::
+    
+    {
+      "profiles": [
+        {"name": "sports_hd", "groups": ["Sports"], "hd": true},
+        {"name": "south", "groups": ["Regional Tamil", "Regional Telugu"]},
+        {"name": "news_pack", "epg": [[200, 299]]},
+        {"name": "no_tamil", "exclude_groups": ["Regional Tamil"], "hd": false},
+        {"name": "starter", "ids": ["starplus", "colors", "aajtak"]},
+        {"name": "sports_prime", "query": "group:Sports and hd and epg:298..310"}
+      ]
+    }
+
+The catalog is loaded and every channel entry is rendered once in the parent
+process. Both are handed to a pool of worker processes, which only select
+their profile's channels and write the pre-rendered bytes, so building many
+profiles scales with the number of CPU cores.
+
+Usage:
+    python3 playlist_profiles.py profiles.json -o profiles/
+    python3 generate_tata_sky_m3u.py --profiles profiles.json --jobs 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from channel_query import QuerySyntaxError, compile_query, query_positions
+from tata_sky_core import (
+    CHANNELS_JSON,
+    ChannelCatalog,
+    default_channels,
+    encode_channel_entries,
+    load_catalog,
+    render_playlists,
+    select_channels,
+    write_channel_json,
+)
+
+# Profile names become directory names
+PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+# Keys a profile may use besides "name"
+PROFILE_FILTERS = ("groups", "exclude_groups", "hd", "epg", "ids", "query")
+
+# Catalog and rendered entries shared by every task in a worker process
+_worker_catalog = None
+_worker_entries = None
+
+def is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def is_epg_range(value):
+    return (isinstance(value, list) and len(value) == 2
+            and all(isinstance(bound, int) and not isinstance(bound, bool) for bound in value)
+            and value[0] <= value[1])
+
+def validate_filters(profile):
+    """Raise ValueError if a profile filter has the wrong type."""
+    name = profile["name"]
+    for key in ("groups", "exclude_groups", "ids"):
+        if key in profile and not is_string_list(profile[key]):
+            raise ValueError(f"Profile {name}: {key} must be a list of strings")
+    if "hd" in profile and not isinstance(profile["hd"], bool):
+        raise ValueError(f"Profile {name}: hd must be true or false")
+    if "epg" in profile:
+        epg = profile["epg"]
+        ranges = epg if isinstance(epg, list) and epg and isinstance(epg[0], list) else [epg]
+        if not all(is_epg_range(pair) for pair in ranges):
+            raise ValueError(f"Profile {name}: epg must be a [low, high] range of channel numbers "
+                             "or a list of such ranges")
+    if "query" in profile:
+        if not isinstance(profile["query"], str):
+            raise ValueError(f"Profile {name}: query must be a string")
+        try:
+            compile_query(profile["query"])
+        except QuerySyntaxError as e:
+            raise ValueError(f"Profile {name}: invalid query: {e}") from None
+
+def load_profiles(path):
+    """Load and validate profiles from a JSON config file.
+    
+    Raises ValueError for a malformed config.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    profiles = data.get("profiles") if isinstance(data, dict) else data
+    if not isinstance(profiles, list):
+        raise ValueError("Expected a list of profiles")
+    
+    names = set()
+    for profile in profiles:
+        if not isinstance(profile, dict):
+            raise ValueError(f"Expected a profile object, got {profile!r}")
+        name = profile.get("name")
+        if not isinstance(name, str) or not PROFILE_NAME_RE.match(name):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        if name in names:
+            raise ValueError(f"Duplicate profile name: {name}")
+        names.add(name)
+        unknown = set(profile) - set(PROFILE_FILTERS) - {"name"}
+        if unknown:
+            raise ValueError(f"Unknown keys in profile {name}: {', '.join(sorted(unknown))}")
+        validate_filters(profile)
+    return profiles
+
+def profile_positions(catalog, profile):
+    """Return the catalog positions selected by a profile.
+    
+    A ``query`` expression is combined with the other filters.
+    """
+    positions = None
+    if "query" in profile:
+        positions = query_positions(catalog, profile["query"])
+        if not set(profile) & (set(PROFILE_FILTERS) - {"query"}):
+            return positions
+    
+    epg = profile.get("epg")
+    if epg and not isinstance(epg[0], list):
+        # A single [low, high] range
+        epg = [epg]
+    selected = select_channels(
+        catalog,
+        groups=profile.get("groups"),
+        hd=profile.get("hd"),
+        epg_ranges=[tuple(pair) for pair in epg] if epg else None,
+        ids=profile.get("ids"),
+        exclude_groups=profile.get("exclude_groups"),
+    )
+    if positions is not None:
+        matched = set(positions)
+        selected = [position for position in selected if position in matched]
+    return selected
+
+def _init_worker(catalog, entries):
+    """Install the shared catalog and rendered entries in this process."""
+    global _worker_catalog, _worker_entries
+    _worker_catalog = catalog
+    _worker_entries = entries
+
+def build_profile(profile, directory):
+    """Write all playlist variants for one profile. Returns its statistics.
+    
+    Uses the catalog and rendered entries installed in this process,
+    either by the pool initializer or by ``generate_profiles``.
+    """
+    positions = profile_positions(_worker_catalog, profile)
+    channels = ChannelCatalog(_worker_catalog[position] for position in positions)
+    entries = [_worker_entries[position] for position in positions]
+    
+    profile_directory = os.path.join(directory, profile["name"])
+    os.makedirs(profile_directory, exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = render_playlists(channels, profile_directory, entries=entries)
+        write_channel_json(os.path.join(profile_directory, CHANNELS_JSON), channels, stats)
+    return stats
+
+def generate_profiles(catalog, profiles, directory, jobs=None):
+    """Generate every profile, in parallel when ``jobs`` is not 1.
+    
+    Returns ``{profile name: statistics}`` in config order.
+    """
+    entries = encode_channel_entries(catalog)
+    if jobs == 1 or len(profiles) < 2:
+        _init_worker(catalog, entries)
+        return {profile["name"]: build_profile(profile, directory) for profile in profiles}
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(catalog, entries)) as executor:
+        futures = [executor.submit(build_profile, profile, directory) for profile in profiles]
+        return {profile["name"]: future.result() for profile, future in zip(profiles, futures)}
+
+def print_profile_summary(results, directory):
+    """Print one line per generated profile."""
+    for name, stats in results.items():
+        print(f"✓ {os.path.join(directory, name)}: {stats['total_channels']} channels "
+              f"({stats['hd_channels']} HD, {stats['sd_channels']} SD, {stats['categories']} categories)")
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate playlists for every profile in a config file.")
+    parser.add_argument("config", help="JSON profile config")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="JSON channel catalog (default: the built-in channel list)")
+    parser.add_argument("-o", "--output-dir", default="profiles", metavar="DIR",
+                        help="directory for the profile subdirectories (default: profiles)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+    
+    catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+    try:
+        profiles = load_profiles(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid profiles config {args.config}: {e}")
+    results = generate_profiles(catalog, profiles, args.output_dir, args.jobs)
+    print_profile_summary(results, args.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Playlist HTTP Server
+====================
+
+Serves filtered playlists from the channel catalog over HTTP, for example::
+    
+    /playlist.m3u                      all channels
+    /playlist.m3u?group=Sports&hd=1    HD sports channels
+    /playlist.m3u?epg=298-310          channel numbers 298 to 310
+    /playlist.m3u?epg=900-             channel numbers 900 and up
+    /categories.m3u?group=News,Kids    organized by category
+    /playlist.m3u?q=group:Regional*%20and%20not%20group:"Regional%20Tamil"
+                                       a channel query (see channel_query.py)
+
+Responses are assembled from channel entries that are rendered to bytes
+once at startup. Each response is cached in an LRU keyed on the normalized
+query and bounded by the total size of the cached bodies, carries an ETag
+(``If-None-Match`` gets a 304) and is gzip-compressed once for clients that
+accept it, so repeated polls are answered without re-rendering.
+
+Usage:
+    python3 playlist_server.py --port 8080
+    python3 generate_tata_sky_m3u.py --serve 0.0.0.0:8080
+"""
+
+import argparse
+import gzip
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from operator import itemgetter
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+from channel_query import QuerySyntaxError, parse_epg_value, query_positions
+from tata_sky_core import (
+    ChannelCatalog,
+    create_category_header,
+    create_m3u_header,
+    default_channels,
+    encode_channel_entries,
+    load_catalog,
+    select_channels,
+)
+
+# Total bytes of response bodies (plain and gzip) kept in the cache
+CACHE_BYTES = 64 << 20
+
+# How long players may reuse a response without revalidating
+CACHE_MAX_AGE = 60
+
+# Query parameters understood by the server; anything else is ignored
+QUERY_PARAMETERS = ("group", "hd", "epg", "id", "q")
+
+PLAYLIST_PATHS = {
+    "/playlist.m3u": "Tata Sky Custom Playlist",
+    "/categories.m3u": "Tata Sky Channels by Category",
+}
+
+class QueryError(ValueError):
+    """Raised for malformed playlist query parameters."""
+
+def normalize_query(query_string):
+    """Turn a query string into a hashable, order-independent cache key.
+    
+    Repeated and comma-separated values are merged, duplicates removed and
+    values sorted, so equivalent URLs share one cache entry.
+    """
+    parsed = parse_qs(query_string, keep_blank_values=False)
+    normalized = []
+    for name in QUERY_PARAMETERS:
+        values = set()
+        for value in parsed.get(name, ()):
+            if name == "q":
+                # Query expressions are kept whole
+                values.add(value.strip())
+            else:
+                values.update(part.strip() for part in value.split(",") if part.strip())
+        if values:
+            normalized.append((name, tuple(sorted(values))))
+    return tuple(normalized)
+
+def parse_hd(value):
+    """Parse an hd query value into a bool."""
+    value = value.lower()
+    if value in ("1", "true", "yes"):
+        return True
+    if value in ("0", "false", "no"):
+        return False
+    raise QueryError(f"invalid hd value: {value}")
+
+def parse_epg_range(value):
+    """Parse "298", "298-310" or an open-ended "300-" into an inclusive range."""
+    try:
+        return parse_epg_value(value)
+    except QuerySyntaxError as e:
+        raise QueryError(str(e))
+
+class CachedResponse:
+    """A rendered playlist with its ETag and gzip body, built on first use."""
+    
+    __slots__ = ("key", "body", "etag", "gzip_etag", "gzip_body")
+    
+    def __init__(self, key, body):
+        self.key = key
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+        self.gzip_body = None
+    
+    @property
+    def size(self):
+        """Bytes held by this response's bodies."""
+        return len(self.body) + (len(self.gzip_body) if self.gzip_body is not None else 0)
+
+class PlaylistService:
+    """Renders filtered playlists from pre-encoded entries, with an LRU cache.
+    
+    The cache holds at most ``cache_bytes`` of response bodies; responses
+    larger than that are served but not cached.
+    """
+    
+    def __init__(self, catalog, cache_bytes=CACHE_BYTES):
+        self.catalog = catalog
+        self.entries = encode_channel_entries(catalog)
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def select(self, query):
+        """Return catalog positions matching a normalized query, in catalog order."""
+        filters = dict(query)
+        positions = None
+        if "q" in filters:
+            expression = " and ".join(f"({value})" for value in filters.pop("q"))
+            try:
+                positions = query_positions(self.catalog, expression)
+            except QuerySyntaxError as e:
+                raise QueryError(f"invalid q: {e}")
+            if not filters:
+                return positions
+        
+        hd_values = {parse_hd(value) for value in filters.get("hd", ())}
+        selected = select_channels(
+            self.catalog,
+            groups=filters.get("group"),
+            hd=hd_values.pop() if len(hd_values) == 1 else None,
+            epg_ranges=[parse_epg_range(value) for value in filters.get("epg", ())],
+            ids=filters.get("id"),
+        )
+        if positions is not None:
+            matched = set(positions)
+            selected = [position for position in selected if position in matched]
+        return selected
+    
+    def render(self, path, query):
+        """Render a playlist for a path and normalized query to bytes."""
+        positions = self.select(query)
+        parts = [create_m3u_header(PLAYLIST_PATHS[path]).encode("utf-8")]
+        if path == "/categories.m3u":
+            categories = {}
+            for position in positions:
+                channel = self.catalog[position]
+                categories.setdefault(channel.group, []).append((channel.name, self.entries[position]))
+            for category in sorted(categories):
+                parts.append(create_category_header(category).encode("utf-8"))
+                parts.extend(entry for _, entry in sorted(categories[category], key=itemgetter(0)))
+        else:
+            parts.extend(self.entries[position] for position in positions)
+        return b"".join(parts)
+    
+    def get(self, path, query_string):
+        """Return the cached response for a request, rendering it on a miss."""
+        key = (path, normalize_query(query_string))
+        with self._lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return response
+        
+        response = CachedResponse(key, self.render(path, key[1]))
+        with self._lock:
+            self.misses += 1
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self.cached_bytes -= previous.size
+            if response.size <= self.cache_bytes:
+                self._cache[key] = response
+                self.cached_bytes += response.size
+                self._evict()
+        return response
+    
+    def gzip_body(self, response):
+        """Return a response's gzip body, charging it to the cache on first use."""
+        if response.gzip_body is not None:
+            return response.gzip_body
+        body = gzip.compress(response.body, compresslevel=6)
+        with self._lock:
+            if response.gzip_body is None:
+                response.gzip_body = body
+                if self._cache.get(response.key) is response:
+                    self.cached_bytes += len(body)
+                    self._evict()
+        return response.gzip_body
+    
+    def _evict(self):
+        # Drop least recently used responses until the cache fits; the
+        # caller holds the lock
+        while self.cached_bytes > self.cache_bytes and self._cache:
+            _, response = self._cache.popitem(last=False)
+            self.cached_bytes -= response.size
+
+class PlaylistRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving playlists from the server's PlaylistService."""
+    
+    server_version = "TataSkyPlaylist/1.0"
+    
+    def do_GET(self):
+        self.respond(send_body=True)
+    
+    def do_HEAD(self):
+        self.respond(send_body=False)
+    
+    def respond(self, send_body):
+        url = urlsplit(self.path)
+        if url.path not in PLAYLIST_PATHS:
+            self.send_error(404, "Unknown playlist")
+            return
+        try:
+            response = self.server.service.get(url.path, url.query)
+        except QueryError as e:
+            self.send_error(400, str(e))
+            return
+        
+        use_gzip = accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = response.gzip_etag if use_gzip else response.etag
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={CACHE_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        
+        body = response.body
+        if use_gzip:
+            body = self.server.service.gzip_body(response)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/x-mpegurl; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+def accepts_gzip(header):
+    """Check whether an Accept-Encoding header allows gzip.
+    
+    Codings with ``q=0`` are refused; an explicit gzip entry takes
+    precedence over ``*``.
+    """
+    if not header:
+        return False
+    qualities = {}
+    for part in header.split(","):
+        coding, *parameters = [value.strip() for value in part.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+def etag_matches(header, etag):
+    """Check an If-None-Match header against an ETag."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class PlaylistServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server holding a PlaylistService."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, service):
+        super().__init__(address, PlaylistRequestHandler)
+        self.service = service
+
+def parse_address(value, default_host="127.0.0.1"):
+    """Parse "PORT" or "HOST:PORT" into a (host, port) tuple."""
+    host, _, port = value.rpartition(":")
+    return host or default_host, int(port)
+
+def serve(catalog, host="127.0.0.1", port=8080, cache_bytes=CACHE_BYTES):
+    """Serve playlists for a catalog until interrupted."""
+    server = PlaylistServer((host, port), PlaylistService(catalog, cache_bytes))
+    print(f"Serving {len(catalog)} channels on http://{host}:{server.server_port}/playlist.m3u")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Serve filtered Tata Sky playlists over HTTP.")
+    parser.add_argument("--catalog", metavar="PATH",
+                        help="JSON channel catalog (default: the built-in channel list)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-mb", type=float, default=CACHE_BYTES / 1048576,
+                        help=f"MiB of responses to cache (default: {CACHE_BYTES >> 20})")
+    args = parser.parse_args(argv)
+    
+    catalog = load_catalog(args.catalog) if args.catalog else ChannelCatalog(default_channels())
+    serve(catalog, args.host, args.port, int(args.cache_mb * 1048576))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
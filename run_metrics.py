@@ -0,0 +1,150 @@
+"""
+Run Metrics
+===========
+
+Per-stage instrumentation for generation runs: wall time, CPU time and bytes
+written, plus memory allocated and peak when allocation tracing (via
+``tracemalloc``) is turned on. Tracing slows Python code down several times,
+so it is off by default; runs with tracing or cProfile list that overhead
+next to their timings. Metrics are saved as JSON and optionally in the
+Prometheus text exposition format, so nightly builds can be fed into
+dashboards.
+
+Used by ``generate_tata_sky_m3u.py --metrics``.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Prefix for every exported Prometheus metric
+PROMETHEUS_PREFIX = "tata_sky"
+
+# Stage fields exported to Prometheus: (field, metric suffix, help text)
+PROMETHEUS_METRICS = (
+    ("wall_seconds", "stage_wall_seconds", "Wall time per generation stage."),
+    ("cpu_seconds", "stage_cpu_seconds", "CPU time of this process per generation stage."),
+    ("allocated_bytes", "stage_allocated_bytes", "Memory still allocated at the end of each stage."),
+    ("peak_bytes", "stage_peak_bytes", "Peak traced memory during each stage."),
+    ("bytes_written", "stage_bytes_written", "Bytes written to output files per stage."),
+)
+
+class StageMetrics:
+    """Measurements for one stage."""
+    
+    __slots__ = ("name", "wall_seconds", "cpu_seconds", "allocated_bytes", "peak_bytes", "bytes_written")
+    
+    def __init__(self, name):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.allocated_bytes = None
+        self.peak_bytes = None
+        self.bytes_written = 0
+    
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class RunMetrics:
+    """Collects stage metrics for one run.
+    
+    ``bytes_counter`` is a callable returning the total bytes written so
+    far; each stage records the difference. Stages may be nested, e.g.
+    "render_playlists" and "render_playlists.categories". Memory is only
+    measured with ``trace_allocations``. ``overhead`` names the tools
+    slowing down the timings (tracemalloc, cProfile).
+    """
+    
+    def __init__(self, bytes_counter=None, trace_allocations=False):
+        self.bytes_counter = bytes_counter or (lambda: 0)
+        self.trace_allocations = trace_allocations
+        self.overhead = ["tracemalloc"] if trace_allocations else []
+        self.stages = []
+        self._active = []
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def _fold_peak(self):
+        # Record the peak so far into every open stage before it is reset
+        peak = tracemalloc.get_traced_memory()[1]
+        for stage in self._active:
+            stage.peak_bytes = max(stage.peak_bytes or 0, peak)
+    
+    @contextmanager
+    def stage(self, name):
+        """Measure the enclosed block as a stage named ``name``."""
+        metrics = StageMetrics(name)
+        tracing = self.trace_allocations and tracemalloc.is_tracing()
+        start_allocated = 0
+        if tracing:
+            self._fold_peak()
+            start_allocated = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        self._active.append(metrics)
+        self.stages.append(metrics)
+        start_bytes = self.bytes_counter()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds = round(time.perf_counter() - start_wall, 6)
+            metrics.cpu_seconds = round(time.process_time() - start_cpu, 6)
+            metrics.bytes_written = self.bytes_counter() - start_bytes
+            if tracing:
+                self._fold_peak()
+                metrics.allocated_bytes = tracemalloc.get_traced_memory()[0] - start_allocated
+            self._active.pop()
+    
+    def to_dict(self):
+        """Return all metrics as a JSON-serializable dict, stages in start order."""
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "timing_overhead": list(self.overhead),
+            "total": {
+                "wall_seconds": round(time.perf_counter() - self._started, 6),
+                "cpu_seconds": round(time.process_time() - self._started_cpu, 6),
+                "bytes_written": self.bytes_counter(),
+            },
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+    
+    def to_prometheus(self):
+        """Return the stage metrics in the Prometheus text exposition format."""
+        lines = []
+        for field, suffix, help_text in PROMETHEUS_METRICS:
+            name = f"{PROMETHEUS_PREFIX}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for stage in self.stages:
+                value = getattr(stage, field)
+                if value is not None:
+                    lines.append(f'{name}{{stage="{stage.name}"}} {value}')
+        return "\n".join(lines) + "\n"
+    
+    def stop(self):
+        """Stop allocation tracing started by this instance."""
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def format_stage_table(metrics):
+    """Format stage metrics as a plain-text table."""
+    lines = [f"{'Stage':<30} {'Wall s':>9} {'CPU s':>9} {'Peak MiB':>9} {'Written MiB':>12}"]
+    for stage in metrics.stages:
+        peak = f"{stage.peak_bytes / 1048576:9.2f}" if stage.peak_bytes is not None else f"{'-':>9}"
+        lines.append(f"{stage.name:<30} {stage.wall_seconds:9.4f} {stage.cpu_seconds:9.4f} "
+                     f"{peak} {stage.bytes_written / 1048576:12.2f}")
+    if metrics.overhead:
+        lines.append(f"Timings include {' and '.join(metrics.overhead)} overhead.")
+    return "\n".join(lines)
+
+def metrics_json(metrics):
+    """Serialize run metrics to JSON text."""
+    return json.dumps(metrics.to_dict(), indent=2)
@@ -0,0 +1,829 @@
+"""
+Tata Sky Playlist Core
+======================
+
+The channel catalog, playlist rendering and atomic file output shared by
+``generate_tata_sky_m3u.py`` and the tool modules (server, profiles, query,
+exports, EPG and logo cache).
+
+Keeping this code out of the command line script means there is only ever one
+copy of it loaded, however the script was started, so ``isinstance`` checks
+and the ``AtomicOutput.total_bytes_written`` counter behave the same
+everywhere.
+
+Usage:
+    from tata_sky_core import ChannelCatalog, default_channels, render_playlists
+    
+    catalog = ChannelCatalog(default_channels())
+    render_playlists(catalog, "public/")
+"""
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from operator import itemgetter
+
+# Buffer size used when streaming playlists to disk
+WRITE_BUFFER_SIZE = 1 << 16
+
+# zlib's default level; gzip's own default (9) is much slower for little gain
+GZIP_LEVEL = 6
+
+# Channel attributes, in the order used by the JSON schema
+CHANNEL_FIELDS = ("name", "id", "logo", "group", "hd", "epg")
+
+# Incremental-build manifest, written next to the outputs. Bump the version
+# whenever the rendered output format changes.
+MANIFEST_FILE = ".tata_sky_manifest.json"
+MANIFEST_VERSION = 1
+
+# Channel data JSON file
+CHANNELS_JSON = "tata_sky_channels.json"
+
+# Catalog files handled by catalog_export.py (with or without .gz)
+CATALOG_EXPORT_SUFFIXES = (".jsonl", ".jsonl.gz", ".columns.json", ".columns.json.gz")
+
+# Playlists filled in catalog order: (filename, title, HD filter or None)
+PLAYLIST_VARIANTS = (
+    ("tata_sky_playlist.m3u", "Tata Sky Complete Playlist", None),
+    ("tata_sky_playlist_hd.m3u", "Tata Sky HD Channels", True),
+    ("tata_sky_playlist_sd.m3u", "Tata Sky SD Channels", False),
+)
+
+# Category-organized playlist: (filename, title)
+CATEGORIES_PLAYLIST = ("tata_sky_playlist_categories.m3u", "Tata Sky Channels by Category")
+
+
+def create_m3u_header(playlist_name="Tata Sky Playlist"):
+    """Create the M3U header with metadata."""
+    return f"""#EXTM3U x-tvg-url="https://raw.githubusercontent.com/iptv-org/epg/master/xml/tata_play.xml"
+#EXTINF:-1 tvg-name="{playlist_name}" tvg-logo="https://www.tataplay.com/images/logo.png" group-title="INFO",{playlist_name}
+#EXTVLCOPT:http-user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36
+#EXTVLCOPT:http-referrer=https://www.tataplay.com/
+"""
+
+def create_channel_entry(name, channel_id, logo_url, group_title, hd=False, epg_no=None):
+    """Create a channel entry for the M3U playlist."""
+    hd_tag = " HD" if hd else ""
+    hd_flag = "1" if hd else "0"
+    
+    # Format EPG number
+    epg_tag = f" tvg-chno=\"{epg_no}\"" if epg_no else ""
+    
+    # Create the EXTINF line
+    extinf = f"#EXTINF:-1 tvg-id=\"{channel_id}\" tvg-name=\"{name}{hd_tag}\" tvg-logo=\"{logo_url}\" group-title=\"{group_title}\"{epg_tag}, {name}{hd_tag}\n"
+    
+    # Placeholder for stream URL (to be filled by user or API)
+    stream_url = f"#EXTVLCOPT:http-user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36\n#EXTVLCOPT:http-referrer=https://www.tataplay.com/\n"
+    
+    return extinf + stream_url
+
+class Channel:
+    """Compact channel record (uses __slots__ instead of a per-channel dict)."""
+    
+    __slots__ = CHANNEL_FIELDS
+    
+    def __init__(self, name, id, logo, group, hd=False, epg=None):
+        self.name = name
+        self.id = id
+        self.logo = logo
+        self.group = sys.intern(group)
+        self.hd = bool(hd)
+        self.epg = epg
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a channel dict in the JSON schema."""
+        return cls(data["name"], data["id"], data.get("logo", ""), data["group"],
+                   data.get("hd", False), data.get("epg"))
+    
+    def __getitem__(self, key):
+        # Dict-style access keeps code written against channel dicts working
+        if key not in CHANNEL_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def to_dict(self):
+        """Return the channel as a dict in the JSON schema."""
+        return {field: getattr(self, field) for field in CHANNEL_FIELDS}
+    
+    def __repr__(self):
+        return f"Channel({self.id!r}, group={self.group!r}, hd={self.hd}, epg={self.epg})"
+
+class ChannelCatalog:
+    """Channel records with lookup indexes by id, group, EPG number and HD flag."""
+    
+    def __init__(self, channels=()):
+        self.channels = []
+        self.by_id = {}
+        self.positions = {}
+        self.by_group = {}
+        self.by_epg = {}
+        self.epg_numbers = None
+        self.hd = []
+        self.sd = []
+        for channel in channels:
+            self.add(channel)
+    
+    def add(self, channel):
+        """Add a channel (record or dict) and index it."""
+        if not isinstance(channel, Channel):
+            channel = Channel.from_dict(channel)
+        if channel.id in self.by_id:
+            raise ValueError(f"Duplicate channel id: {channel.id}")
+        self.positions[channel.id] = len(self.channels)
+        self.channels.append(channel)
+        self.by_id[channel.id] = channel
+        self.by_group.setdefault(channel.group, []).append(channel)
+        if channel.epg is not None:
+            self.by_epg.setdefault(channel.epg, []).append(channel)
+            self.epg_numbers = None
+        (self.hd if channel.hd else self.sd).append(channel)
+        return channel
+    
+    def __len__(self):
+        return len(self.channels)
+    
+    def __iter__(self):
+        return iter(self.channels)
+    
+    def __getitem__(self, index):
+        return self.channels[index]
+    
+    def get(self, channel_id, default=None):
+        """Look up a channel by id."""
+        return self.by_id.get(channel_id, default)
+    
+    def in_group(self, group):
+        """Return the channels of a group in catalog order."""
+        return self.by_group.get(group, [])
+    
+    def with_epg(self, epg):
+        """Return the channels carrying an EPG channel number."""
+        return self.by_epg.get(epg, [])
+    
+    def in_epg_range(self, low, high):
+        """Return the channels with an EPG number in ``low..high`` (inclusive).
+        
+        Bisects a sorted list of the EPG numbers, built on first use.
+        """
+        if self.epg_numbers is None:
+            self.epg_numbers = sorted(self.by_epg)
+        start = bisect_left(self.epg_numbers, low)
+        end = bisect_right(self.epg_numbers, high)
+        return [channel for epg in self.epg_numbers[start:end] for channel in self.by_epg[epg]]
+    
+    def groups(self):
+        """Return the group names in first-seen order."""
+        return list(self.by_group)
+    
+    def to_dicts(self):
+        """Return all channels as dicts in the JSON schema."""
+        return [channel.to_dict() for channel in self.channels]
+
+def load_catalog(path):
+    """Load a channel catalog from a JSON file.
+    
+    Accepts the ``tata_sky_channels.json`` schema (an object with a
+    ``channels`` list) or a bare list of channel objects, optionally
+    gzip-compressed, as well as the JSON Lines and columnar exports of
+    ``catalog_export.py``.
+    """
+    if path.endswith(CATALOG_EXPORT_SUFFIXES):
+        from catalog_export import load_exported_catalog
+        
+        return load_exported_catalog(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["channels"]
+    return ChannelCatalog(data)
+
+def select_channels(catalog, groups=None, hd=None, epg_ranges=None, ids=None, exclude_groups=None):
+    """Return the catalog positions of matching channels, in catalog order.
+    
+    Filters left as None are not applied. ``epg_ranges`` is a list of
+    inclusive ``(low, high)`` channel number ranges. Candidates come from
+    the most specific catalog index, so the cost follows the matches.
+    """
+    if ids is not None:
+        candidates = [catalog.by_id[channel_id] for channel_id in dict.fromkeys(ids) if channel_id in catalog.by_id]
+    elif groups is not None:
+        candidates = [channel for group in set(groups) for channel in catalog.in_group(group)]
+    elif epg_ranges:
+        # Overlapping ranges can yield a channel twice
+        candidates = list({
+            channel.id: channel
+            for low, high in epg_ranges for channel in catalog.in_epg_range(low, high)
+        }.values())
+    elif hd is not None:
+        candidates = catalog.hd if hd else catalog.sd
+    else:
+        candidates = catalog.channels
+    
+    if ids is not None and groups is not None:
+        groups = set(groups)
+        candidates = [channel for channel in candidates if channel.group in groups]
+    if hd is not None:
+        candidates = [channel for channel in candidates if channel.hd == hd]
+    if exclude_groups:
+        exclude_groups = set(exclude_groups)
+        candidates = [channel for channel in candidates if channel.group not in exclude_groups]
+    if epg_ranges and (ids is not None or groups is not None):
+        candidates = [
+            channel for channel in candidates
+            if channel.epg is not None and any(low <= channel.epg <= high for low, high in epg_ranges)
+        ]
+    return sorted(catalog.positions[channel.id] for channel in candidates)
+
+def default_channels():
+    """Return the built-in Tata Sky channel list."""
+    
+    # Tata Sky channel data (simplified version - can be expanded)
+    channels = [
+        # Hindi Entertainment
+        {"name": "Star Plus", "id": "starplus", "logo": "https://i.imgur.com/1.png", "group": "Hindi Entertainment", "hd": False, "epg": 117},
+        {"name": "Star Plus HD", "id": "starplus_hd", "logo": "https://i.imgur.com/1hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 115},
+        {"name": "Star Bharat", "id": "starbharat", "logo": "https://i.imgur.com/2.png", "group": "Hindi Entertainment", "hd": False, "epg": 122},
+        {"name": "Star Bharat HD", "id": "starbharat_hd", "logo": "https://i.imgur.com/2hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 121},
+        {"name": "Sony Entertainment Television", "id": "sony_ent", "logo": "https://i.imgur.com/3.png", "group": "Hindi Entertainment", "hd": False, "epg": 130},
+        {"name": "Sony Entertainment Television HD", "id": "sony_ent_hd", "logo": "https://i.imgur.com/3hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 128},
+        {"name": "Sony SAB", "id": "sony_sab", "logo": "https://i.imgur.com/4.png", "group": "Hindi Entertainment", "hd": False, "epg": 134},
+        {"name": "Sony SAB HD", "id": "sony_sab_hd", "logo": "https://i.imgur.com/4hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 132},
+        {"name": "&TV", "id": "andtv", "logo": "https://i.imgur.com/5.png", "group": "Hindi Entertainment", "hd": False, "epg": 139},
+        {"name": "&TV HD", "id": "andtv_hd", "logo": "https://i.imgur.com/5hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 137},
+        {"name": "Zee TV", "id": "zeetv", "logo": "https://i.imgur.com/6.png", "group": "Hindi Entertainment", "hd": False, "epg": 143},
+        {"name": "Zee TV HD", "id": "zeetv_hd", "logo": "https://i.imgur.com/6hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 141},
+        {"name": "Colors", "id": "colors", "logo": "https://i.imgur.com/7.png", "group": "Hindi Entertainment", "hd": False, "epg": 149},
+        {"name": "Colors HD", "id": "colors_hd", "logo": "https://i.imgur.com/7hd.png", "group": "Hindi Entertainment", "hd": True, "epg": 147},
+        
+        # Hindi Movies
+        {"name": "Star Gold", "id": "stargold", "logo": "https://i.imgur.com/8.png", "group": "Hindi Movies", "hd": False, "epg": 150},
+        {"name": "Star Gold HD", "id": "stargold_hd", "logo": "https://i.imgur.com/8hd.png", "group": "Hindi Movies", "hd": True, "epg": 148},
+        {"name": "Star Gold 2", "id": "stargold2", "logo": "https://i.imgur.com/9.png", "group": "Hindi Movies", "hd": False, "epg": 152},
+        {"name": "Star Gold 2 HD", "id": "stargold2_hd", "logo": "https://i.imgur.com/9hd.png", "group": "Hindi Movies", "hd": True, "epg": 151},
+        {"name": "Sony Max", "id": "sonymax", "logo": "https://i.imgur.com/10.png", "group": "Hindi Movies", "hd": False, "epg": 154},
+        {"name": "Sony Max HD", "id": "sonymax_hd", "logo": "https://i.imgur.com/10hd.png", "group": "Hindi Movies", "hd": True, "epg": 153},
+        {"name": "Sony Max 2", "id": "sonymax2", "logo": "https://i.imgur.com/11.png", "group": "Hindi Movies", "hd": False, "epg": 156},
+        {"name": "Sony Max 2 HD", "id": "sonymax2_hd", "logo": "https://i.imgur.com/11hd.png", "group": "Hindi Movies", "hd": True, "epg": 155},
+        {"name": "Zee Cinema", "id": "zeecinema", "logo": "https://i.imgur.com/12.png", "group": "Hindi Movies", "hd": False, "epg": 158},
+        {"name": "Zee Cinema HD", "id": "zeecinema_hd", "logo": "https://i.imgur.com/12hd.png", "group": "Hindi Movies", "hd": True, "epg": 157},
+        
+        # News
+        {"name": "Aaj Tak", "id": "aajtak", "logo": "https://i.imgur.com/13.png", "group": "News", "hd": False, "epg": 200},
+        {"name": "India Today", "id": "indiatoday", "logo": "https://i.imgur.com/14.png", "group": "News", "hd": False, "epg": 201},
+        {"name": "NDTV 24x7", "id": "ndtv24x7", "logo": "https://i.imgur.com/15.png", "group": "News", "hd": False, "epg": 202},
+        {"name": "Times Now", "id": "timesnow", "logo": "https://i.imgur.com/16.png", "group": "News", "hd": False, "epg": 203},
+        {"name": "Republic TV", "id": "republictv", "logo": "https://i.imgur.com/17.png", "group": "News", "hd": False, "epg": 204},
+        
+        # Sports
+        {"name": "Star Sports 1", "id": "starsports1", "logo": "https://i.imgur.com/18.png", "group": "Sports", "hd": False, "epg": 300},
+        {"name": "Star Sports 1 HD", "id": "starsports1_hd", "logo": "https://i.imgur.com/18hd.png", "group": "Sports", "hd": True, "epg": 298},
+        {"name": "Star Sports 2", "id": "starsports2", "logo": "https://i.imgur.com/19.png", "group": "Sports", "hd": False, "epg": 301},
+        {"name": "Star Sports 2 HD", "id": "starsports2_hd", "logo": "https://i.imgur.com/19hd.png", "group": "Sports", "hd": True, "epg": 299},
+        {"name": "Star Sports 3", "id": "starsports3", "logo": "https://i.imgur.com/20.png", "group": "Sports", "hd": False, "epg": 302},
+        {"name": "Star Sports 3 HD", "id": "starsports3_hd", "logo": "https://i.imgur.com/20hd.png", "group": "Sports", "hd": True, "epg": 303},
+        {"name": "Sony Sports Ten 1", "id": "sonysportsten1", "logo": "https://i.imgur.com/21.png", "group": "Sports", "hd": False, "epg": 304},
+        {"name": "Sony Sports Ten 1 HD", "id": "sonysportsten1_hd", "logo": "https://i.imgur.com/21hd.png", "group": "Sports", "hd": True, "epg": 305},
+        {"name": "Sony Sports Ten 2", "id": "sonysportsten2", "logo": "https://i.imgur.com/22.png", "group": "Sports", "hd": False, "epg": 306},
+        {"name": "Sony Sports Ten 2 HD", "id": "sonysportsten2_hd", "logo": "https://i.imgur.com/22hd.png", "group": "Sports", "hd": True, "epg": 307},
+        {"name": "Sony Sports Ten 3", "id": "sonysportsten3", "logo": "https://i.imgur.com/23.png", "group": "Sports", "hd": False, "epg": 308},
+        {"name": "Sony Sports Ten 3 HD", "id": "sonysportsten3_hd", "logo": "https://i.imgur.com/23hd.png", "group": "Sports", "hd": True, "epg": 309},
+        
+        # English Entertainment
+        {"name": "Star World Premiere HD", "id": "starworld_hd", "logo": "https://i.imgur.com/24hd.png", "group": "English Entertainment", "hd": True, "epg": 208},
+        {"name": "WB", "id": "wb", "logo": "https://i.imgur.com/25.png", "group": "English Entertainment", "hd": False, "epg": 369},
+        {"name": "Zee Cafe", "id": "zeecafe", "logo": "https://i.imgur.com/26.png", "group": "English Entertainment", "hd": False, "epg": 220},
+        {"name": "Zee Cafe HD", "id": "zeecafe_hd", "logo": "https://i.imgur.com/26hd.png", "group": "English Entertainment", "hd": True, "epg": 221},
+        
+        # Kids
+        {"name": "Cartoon Network", "id": "cartoonnetwork", "logo": "https://i.imgur.com/27.png", "group": "Kids", "hd": False, "epg": 400},
+        {"name": "Cartoon Network HD", "id": "cartoonnetwork_hd", "logo": "https://i.imgur.com/27hd.png", "group": "Kids", "hd": True, "epg": 401},
+        {"name": "Pogo", "id": "pogo", "logo": "https://i.imgur.com/28.png", "group": "Kids", "hd": False, "epg": 402},
+        {"name": "Nickelodeon", "id": "nickelodeon", "logo": "https://i.imgur.com/29.png", "group": "Kids", "hd": False, "epg": 403},
+        {"name": "Nick HD", "id": "nickhd", "logo": "https://i.imgur.com/29hd.png", "group": "Kids", "hd": True, "epg": 404},
+        
+        # Regional (Tamil)
+        {"name": "Sun TV", "id": "suntv", "logo": "https://i.imgur.com/30.png", "group": "Regional Tamil", "hd": False, "epg": 500},
+        {"name": "Sun TV HD", "id": "suntv_hd", "logo": "https://i.imgur.com/30hd.png", "group": "Regional Tamil", "hd": True, "epg": 501},
+        {"name": "Sun Music", "id": "sunmusic", "logo": "https://i.imgur.com/31.png", "group": "Regional Tamil", "hd": False, "epg": 502},
+        {"name": "Sun Music HD", "id": "sunmusic_hd", "logo": "https://i.imgur.com/31hd.png", "group": "Regional Tamil", "hd": True, "epg": 503},
+        {"name": "Sun News", "id": "sunnews", "logo": "https://i.imgur.com/32.png", "group": "Regional Tamil", "hd": False, "epg": 504},
+        
+        # Regional (Telugu)
+        {"name": "ETV Telugu", "id": "etvtelugu", "logo": "https://i.imgur.com/33.png", "group": "Regional Telugu", "hd": False, "epg": 510},
+        {"name": "ETV Telugu HD", "id": "etvtelugu_hd", "logo": "https://i.imgur.com/33hd.png", "group": "Regional Telugu", "hd": True, "epg": 511},
+        {"name": "Gemini TV", "id": "geminiv", "logo": "https://i.imgur.com/34.png", "group": "Regional Telugu", "hd": False, "epg": 512},
+        {"name": "Gemini TV HD", "id": "geminiv_hd", "logo": "https://i.imgur.com/34hd.png", "group": "Regional Telugu", "hd": True, "epg": 513},
+        
+        # Regional (Kannada)
+        {"name": "Udaya TV", "id": "udayatv", "logo": "https://i.imgur.com/35.png", "group": "Regional Kannada", "hd": False, "epg": 520},
+        {"name": "Udaya TV HD", "id": "udayatv_hd", "logo": "https://i.imgur.com/35hd.png", "group": "Regional Kannada", "hd": True, "epg": 521},
+        {"name": "Udaya Music", "id": "udayamusic", "logo": "https://i.imgur.com/36.png", "group": "Regional Kannada", "hd": False, "epg": 522},
+        
+        # Regional (Malayalam)
+        {"name": "Asianet", "id": "asianet", "logo": "https://i.imgur.com/37.png", "group": "Regional Malayalam", "hd": False, "epg": 530},
+        {"name": "Asianet HD", "id": "asianet_hd", "logo": "https://i.imgur.com/37hd.png", "group": "Regional Malayalam", "hd": True, "epg": 531},
+        {"name": "Surya TV", "id": "suryatv", "logo": "https://i.imgur.com/38.png", "group": "Regional Malayalam", "hd": False, "epg": 532},
+        {"name": "Surya TV HD", "id": "suryatv_hd", "logo": "https://i.imgur.com/38hd.png", "group": "Regional Malayalam", "hd": True, "epg": 533},
+        
+        # Regional (Bengali)
+        {"name": "Zee Bangla", "id": "zeebangla", "logo": "https://i.imgur.com/39.png", "group": "Regional Bengali", "hd": False, "epg": 540},
+        {"name": "Zee Bangla HD", "id": "zeebangla_hd", "logo": "https://i.imgur.com/39hd.png", "group": "Regional Bengali", "hd": True, "epg": 541},
+        {"name": "Zee Bangla Cinema", "id": "zeebanglacinema", "logo": "https://i.imgur.com/40.png", "group": "Regional Bengali", "hd": False, "epg": 542},
+        
+        # Regional (Marathi)
+        {"name": "Zee Marathi", "id": "zeemarathi", "logo": "https://i.imgur.com/41.png", "group": "Regional Marathi", "hd": False, "epg": 550},
+        {"name": "Zee Marathi HD", "id": "zeemarathi_hd", "logo": "https://i.imgur.com/41hd.png", "group": "Regional Marathi", "hd": True, "epg": 551},
+        {"name": "Zee Marathi Cinema", "id": "zeemarathicinema", "logo": "https://i.imgur.com/42.png", "group": "Regional Marathi", "hd": False, "epg": 552},
+        
+        # Regional (Gujarati)
+        {"name": "Zee Gujarati", "id": "zeegujarati", "logo": "https://i.imgur.com/43.png", "group": "Regional Gujarati", "hd": False, "epg": 560},
+        {"name": "Zee Gujarati HD", "id": "zeegujarati_hd", "logo": "https://i.imgur.com/43hd.png", "group": "Regional Gujarati", "hd": True, "epg": 561},
+        {"name": "Zee Gujarati Cinema", "id": "zeegujaratcinema", "logo": "https://i.imgur.com/44.png", "group": "Regional Gujarati", "hd": False, "epg": 562},
+        
+        # Music
+        {"name": "9XM", "id": "9xm", "logo": "https://i.imgur.com/45.png", "group": "Music", "hd": False, "epg": 600},
+        {"name": "MTV India", "id": "mtvindia", "logo": "https://i.imgur.com/46.png", "group": "Music", "hd": False, "epg": 601},
+        {"name": "Bollywood HD", "id": "bollywoodhd", "logo": "https://i.imgur.com/47hd.png", "group": "Music", "hd": True, "epg": 602},
+        {"name": "Bollywood Beats", "id": "bollywoodbeats", "logo": "https://i.imgur.com/48.png", "group": "Music", "hd": False, "epg": 603},
+        
+        # Lifestyle & Infotainment
+        {"name": "Discovery Channel", "id": "discovery", "logo": "https://i.imgur.com/49.png", "group": "Lifestyle & Infotainment", "hd": False, "epg": 700},
+        {"name": "Discovery Channel HD", "id": "discovery_hd", "logo": "https://i.imgur.com/49hd.png", "group": "Lifestyle & Infotainment", "hd": True, "epg": 701},
+        {"name": "National Geographic", "id": "natgeo", "logo": "https://i.imgur.com/50.png", "group": "Lifestyle & Infotainment", "hd": False, "epg": 702},
+        {"name": "National Geographic HD", "id": "natgeo_hd", "logo": "https://i.imgur.com/50hd.png", "group": "Lifestyle & Infotainment", "hd": True, "epg": 703},
+        {"name": "Animal Planet", "id": "animalplanet", "logo": "https://i.imgur.com/51.png", "group": "Lifestyle & Infotainment", "hd": False, "epg": 704},
+        {"name": "Animal Planet HD", "id": "animalplanet_hd", "logo": "https://i.imgur.com/51hd.png", "group": "Lifestyle & Infotainment", "hd": True, "epg": 705},
+        
+        # Religious
+        {"name": "Aastha TV", "id": "aasthatv", "logo": "https://i.imgur.com/52.png", "group": "Religious", "hd": False, "epg": 800},
+        {"name": "Sadhna TV", "id": "sadhnav", "logo": "https://i.imgur.com/53.png", "group": "Religious", "hd": False, "epg": 801},
+        {"name": "Sanskar TV", "id": "sanskartv", "logo": "https://i.imgur.com/54.png", "group": "Religious", "hd": False, "epg": 802},
+        
+        # Shopping
+        {"name": "Jewellery TV", "id": "jewellerytv", "logo": "https://i.imgur.com/55.png", "group": "Shopping", "hd": False, "epg": 900},
+        {"name": "Fashion TV", "id": "fashiontv", "logo": "https://i.imgur.com/56.png", "group": "Shopping", "hd": False, "epg": 901},
+    ]
+    
+    return channels
+
+def iter_channel_entries(channels):
+    """Yield the M3U entry for each channel in order."""
+    for channel in channels:
+        yield create_channel_entry(
+            channel["name"],
+            channel["id"],
+            channel["logo"],
+            channel["group"],
+            channel["hd"],
+            channel["epg"]
+        )
+
+def select_hd(channels, hd):
+    """Return HD or SD channels, using the catalog index when available."""
+    if isinstance(channels, ChannelCatalog):
+        return channels.hd if hd else channels.sd
+    return (ch for ch in channels if bool(ch["hd"]) == hd)
+
+def iter_complete_playlist(channels):
+    """Yield the complete playlist piece by piece."""
+    yield create_m3u_header("Tata Sky Complete Playlist")
+    yield from iter_channel_entries(channels)
+
+def iter_hd_playlist(channels):
+    """Yield the HD-only playlist piece by piece."""
+    yield create_m3u_header("Tata Sky HD Channels")
+    yield from iter_channel_entries(select_hd(channels, True))
+
+def iter_sd_playlist(channels):
+    """Yield the SD-only playlist piece by piece."""
+    yield create_m3u_header("Tata Sky SD Channels")
+    yield from iter_channel_entries(select_hd(channels, False))
+
+def create_category_header(category):
+    """Create the section header entry for a category."""
+    return (
+        f"#EXTINF:-1 group-title=\"{category}\" tvg-logo=\"https://i.imgur.com/1.png\", {category} Channels\n"
+        "#EXTVLCOPT:http-user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36\n"
+        "#EXTVLCOPT:http-referrer=https://www.tataplay.com/\n\n"
+    )
+
+def group_channels(channels):
+    """Group channels by category, preserving catalog order within a group."""
+    if isinstance(channels, ChannelCatalog):
+        return channels.by_group
+    categories = {}
+    for channel in channels:
+        categories.setdefault(channel["group"], []).append(channel)
+    return categories
+
+def iter_categories_playlist(channels):
+    """Yield the category-organized playlist piece by piece."""
+    yield create_m3u_header("Tata Sky Channels by Category")
+    
+    categories = group_channels(channels)
+    
+    # Sort categories alphabetically
+    for category in sorted(categories):
+        yield create_category_header(category)
+        yield from iter_channel_entries(sorted(categories[category], key=lambda x: x["name"]))
+
+def generate_complete_playlist(channels=None):
+    """Generate complete playlist with all channels."""
+    if channels is None:
+        channels = default_channels()
+    return "".join(iter_complete_playlist(channels)), channels
+
+def generate_hd_playlist(channels):
+    """Generate playlist with HD channels only."""
+    return "".join(iter_hd_playlist(channels))
+
+def generate_sd_playlist(channels):
+    """Generate playlist with SD channels only."""
+    return "".join(iter_sd_playlist(channels))
+
+def generate_categories_playlist(channels):
+    """Generate playlist with channels organized by category."""
+    return "".join(iter_categories_playlist(channels))
+
+class AtomicOutput:
+    """Binary file writer that only replaces its target on commit.
+    
+    Data goes to a temp file in the target directory and is hashed as it
+    is written; ``commit()`` renames it into place so readers never see a
+    half-written file. With ``compress``, a gzip copy is written alongside
+    as ``path + ".gz"`` and committed together with it.
+    """
+    
+    # Bytes written to disk by all instances (gzip copies included), for run metrics
+    total_bytes_written = 0
+    
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.tmp_path, self._file = self._open_temp(path)
+        self._hash = hashlib.sha256()
+        self.bytes_written = 0
+        self.compressed_bytes = 0
+        self._gzip = None
+        if compress:
+            self.gzip_tmp_path, self._gzip_file = self._open_temp(path + ".gz")
+            # mtime=0 keeps the compressed bytes identical for identical content
+            self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self._gzip_file,
+                                       compresslevel=GZIP_LEVEL, mtime=0)
+    
+    @staticmethod
+    def _open_temp(path):
+        directory, name = os.path.split(path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+        return tmp_path, os.fdopen(fd, "wb", buffering=WRITE_BUFFER_SIZE)
+    
+    def write(self, data):
+        self._file.write(data)
+        if self._gzip is not None:
+            self._gzip.write(data)
+        self._hash.update(data)
+        self.bytes_written += len(data)
+        AtomicOutput.total_bytes_written += len(data)
+    
+    def hexdigest(self):
+        return self._hash.hexdigest()
+    
+    @property
+    def paths(self):
+        """The target paths: the file, and its gzip copy with ``compress``."""
+        return [target for _, target in self._targets()]
+    
+    def _targets(self):
+        targets = [(self.tmp_path, self.path)]
+        if self._gzip is not None:
+            targets.append((self.gzip_tmp_path, self.path + ".gz"))
+        return targets
+    
+    def _close(self):
+        self._file.close()
+        if self._gzip is not None:
+            self._gzip.close()
+            self.compressed_bytes = self._gzip_file.tell()
+            AtomicOutput.total_bytes_written += self.compressed_bytes
+            self._gzip_file.close()
+    
+    def commit(self, previous_digest=None):
+        """Move the temp file (and gzip copy) into place.
+        
+        If ``previous_digest`` matches the new content and the targets
+        exist, they are left untouched. Returns True if replaced.
+        """
+        self._close()
+        targets = self._targets()
+        if previous_digest == self.hexdigest() and all(os.path.exists(target) for _, target in targets):
+            for tmp_path, _ in targets:
+                os.unlink(tmp_path)
+            return False
+        for tmp_path, target in targets:
+            try:
+                mode = os.stat(target).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, target)
+        return True
+    
+    def discard(self):
+        """Drop the temp files without touching the targets."""
+        self._close()
+        for tmp_path, _ in self._targets():
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+def report_output(path, written):
+    """Print the outcome of writing an output file."""
+    print(f"✓ Saved: {path}" if written else f"• Unchanged: {path}")
+
+def report_commit(output, written):
+    """Report every file of a committed AtomicOutput."""
+    for path in output.paths:
+        report_output(path, written)
+
+def write_playlist(filename, chunks, previous_digest=None):
+    """Stream playlist chunks into a file atomically. Returns the content digest."""
+    output = AtomicOutput(filename)
+    try:
+        for chunk in chunks:
+            output.write(chunk.encode("utf-8"))
+    except BaseException:
+        output.discard()
+        raise
+    report_output(filename, output.commit(previous_digest))
+    return output.hexdigest()
+
+def save_playlist(filename, content):
+    """Save playlist to file."""
+    write_playlist(filename, (content,))
+
+def no_stage(name):
+    """Stand-in for ``RunMetrics.stage`` when metrics are off."""
+    return contextlib.nullcontext()
+
+def encode_channel_entry(channel):
+    """Render a channel entry once and return it as UTF-8 bytes."""
+    return create_channel_entry(
+        channel["name"],
+        channel["id"],
+        channel["logo"],
+        channel["group"],
+        channel["hd"],
+        channel["epg"]
+    ).encode("utf-8")
+
+def encode_channel_entries(channels):
+    """Render every channel entry once, in catalog order."""
+    return [encode_channel_entry(channel) for channel in channels]
+
+def fingerprint_catalog(channels):
+    """Hash the catalog as a whole and per group.
+    
+    Returns ``(catalog_digest, {group: digest})``. Any change to a
+    channel, or to the channel order, changes the catalog digest; group
+    digests only change when that group's channels change.
+    """
+    catalog_hash = hashlib.sha256(f"v{MANIFEST_VERSION}".encode("utf-8"))
+    group_hashes = {}
+    for channel in channels:
+        record = json.dumps([channel[field] for field in CHANNEL_FIELDS]).encode("utf-8") + b"\n"
+        catalog_hash.update(record)
+        group = channel["group"]
+        if group not in group_hashes:
+            group_hashes[group] = hashlib.sha256()
+        group_hashes[group].update(record)
+    return catalog_hash.hexdigest(), {group: h.hexdigest() for group, h in group_hashes.items()}
+
+def load_manifest(directory):
+    """Load the incremental-build manifest, or an empty one."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+def save_manifest(directory, manifest):
+    """Atomically write the incremental-build manifest."""
+    manifest["version"] = MANIFEST_VERSION
+    output = AtomicOutput(os.path.join(directory, MANIFEST_FILE))
+    output.write(json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    output.commit()
+
+def file_fingerprint(path):
+    """Return ``{"size", "sha256"}`` of a file, or None if it is missing."""
+    file_hash = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+                file_hash.update(block)
+    except FileNotFoundError:
+        return None
+    return {"size": os.path.getsize(path), "sha256": file_hash.hexdigest()}
+
+def intact_outputs(directory, manifest, filenames):
+    """Return the filenames whose files still match the manifest.
+    
+    Files that are missing, were edited by hand or were replaced by a run
+    that did not update the manifest are left out.
+    """
+    recorded = manifest.get("files", {})
+    intact = set()
+    for filename in filenames:
+        record = recorded.get(filename)
+        path = os.path.join(directory, filename)
+        if record is None or not os.path.exists(path) or os.path.getsize(path) != record["size"]:
+            continue
+        if file_fingerprint(path) == record:
+            intact.add(filename)
+    return intact
+
+def record_outputs(directory, manifest, filenames):
+    """Record the size and digest of every output file in the manifest."""
+    manifest["files"] = {
+        filename: file_fingerprint(os.path.join(directory, filename)) for filename in filenames
+    }
+
+def read_category_blocks(path, previous):
+    """Read category blocks of a previous categories playlist by offset.
+    
+    Only blocks whose bytes still match their recorded hash are returned.
+    """
+    blocks = {}
+    if not previous:
+        return blocks
+    try:
+        with open(path, "rb") as f:
+            for category, info in previous.items():
+                f.seek(info["offset"])
+                block = f.read(info["length"])
+                if hashlib.sha256(block).hexdigest() == info["sha256"]:
+                    blocks[category] = block
+    except FileNotFoundError:
+        pass
+    return blocks
+
+def render_playlists(channels, directory=".", entries=None, manifest=None, group_digests=None,
+                     metrics=None, compress=False):
+    """Render every playlist variant in a single pass over the channels.
+    
+    Each channel's entry is rendered once (or taken from ``entries``) and
+    written to every matching output. Outputs are written atomically.
+    When a ``manifest`` from a previous run is given, unchanged outputs
+    are left untouched, category blocks whose ``group_digests`` match are
+    reused instead of re-sorted, and the manifest is updated in place.
+    With ``metrics`` (a ``run_metrics.RunMetrics``), the variants and the
+    categories playlist are measured as separate stages. With ``compress``,
+    a gzip copy of every playlist is written alongside it.
+    Returns the channel statistics.
+    """
+    previous_outputs = manifest.get("outputs", {}) if manifest else {}
+    paths = [os.path.join(directory, filename) for filename, _, _ in PLAYLIST_VARIANTS]
+    sinks = [AtomicOutput(path, compress) for path in paths]
+    categories = {}
+    hd_count = 0
+    
+    stage = metrics.stage if metrics is not None else no_stage
+    
+    with stage("render_playlists.variants"):
+        try:
+            for sink, (_, title, _) in zip(sinks, PLAYLIST_VARIANTS):
+                sink.write(create_m3u_header(title).encode("utf-8"))
+            
+            for index, channel in enumerate(channels):
+                entry = entries[index] if entries is not None else encode_channel_entry(channel)
+                hd = bool(channel["hd"])
+                hd_count += hd
+                for sink, (_, _, wants_hd) in zip(sinks, PLAYLIST_VARIANTS):
+                    if wants_hd is None or wants_hd == hd:
+                        sink.write(entry)
+                categories.setdefault(channel["group"], []).append((channel["name"], entry))
+        except BaseException:
+            for sink in sinks:
+                sink.discard()
+            raise
+        outputs = {}
+        for sink, (filename, _, _) in zip(sinks, PLAYLIST_VARIANTS):
+            report_commit(sink, sink.commit(previous_outputs.get(filename)))
+            outputs[filename] = sink.hexdigest()
+    
+    with stage("render_playlists.categories"):
+        filename, title = CATEGORIES_PLAYLIST
+        path = os.path.join(directory, filename)
+        previous_blocks = manifest.get("categories", {}) if manifest else {}
+        # Read reusable blocks before the file is replaced
+        reusable = {}
+        if group_digests:
+            unchanged = {
+                category: info for category, info in previous_blocks.items()
+                if group_digests.get(category) == info.get("group")
+            }
+            reusable = read_category_blocks(path, unchanged)
+        
+        sink = AtomicOutput(path, compress)
+        blocks = {}
+        try:
+            sink.write(create_m3u_header(title).encode("utf-8"))
+            for category in sorted(categories):
+                block = reusable.get(category)
+                if block is None:
+                    parts = [create_category_header(category).encode("utf-8")]
+                    parts.extend(entry for _, entry in sorted(categories[category], key=itemgetter(0)))
+                    block = b"".join(parts)
+                blocks[category] = {
+                    "offset": sink.bytes_written,
+                    "length": len(block),
+                    "sha256": hashlib.sha256(block).hexdigest(),
+                    "group": group_digests.get(category) if group_digests else None,
+                }
+                sink.write(block)
+        except BaseException:
+            sink.discard()
+            raise
+        report_commit(sink, sink.commit(previous_outputs.get(filename)))
+        outputs[filename] = sink.hexdigest()
+    
+    total = sum(len(members) for members in categories.values())
+    stats = {
+        "total_channels": total,
+        "hd_channels": hd_count,
+        "sd_channels": total - hd_count,
+        "categories": len(categories),
+    }
+    if manifest is not None:
+        manifest.setdefault("outputs", {}).update(outputs)
+        manifest["categories"] = blocks
+        manifest["stats"] = stats
+    return stats
+
+def write_batched(output, chunks):
+    """Write text chunks to an AtomicOutput in batches of about WRITE_BUFFER_SIZE."""
+    batch = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_BUFFER_SIZE:
+            output.write("".join(batch).encode("utf-8"))
+            batch = []
+            size = 0
+    if batch:
+        output.write("".join(batch).encode("utf-8"))
+
+def iter_channel_json(header, channels):
+    """Yield the channel data JSON one channel at a time.
+    
+    The text is identical to ``json.dump(data, f, indent=2)`` of
+    ``header`` with a ``channels`` list appended, without building that
+    list in memory.
+    """
+    encode = json.JSONEncoder().encode
+    prefixes = [f"      {encode(field)}: " for field in CHANNEL_FIELDS]
+    # Drop the closing "\n}" so the channels list can follow
+    yield json.dumps(header, indent=2)[:-2] + ',\n  "channels": ['
+    separator = "\n    {\n"
+    for channel in channels:
+        yield separator + ",\n".join(
+            prefix + encode(channel[field]) for prefix, field in zip(prefixes, CHANNEL_FIELDS)
+        )
+        separator = "\n    },\n    {\n"
+    yield "\n    }\n  ]\n}" if len(channels) else "]\n}"
+
+def write_channel_json(path, channels, stats, compress=False):
+    """Stream the channel data JSON file to disk atomically (plus a gzip copy)."""
+    header = {"generated_at": datetime.now().isoformat()}
+    header.update(stats)
+    
+    output = AtomicOutput(path, compress)
+    try:
+        write_batched(output, iter_channel_json(header, channels))
+    except BaseException:
+        output.discard()
+        raise
+    output.commit()
+    report_commit(output, True)
+
+def output_filenames(compress=False, exports=()):
+    """Return the names of every file written by a generation run.
+    
+    ``exports`` are the filenames of extra catalog exports; with
+    ``compress`` the gzip copies are included.
+    """
+    names = [filename for filename, _, _ in PLAYLIST_VARIANTS]
+    names.append(CATEGORIES_PLAYLIST[0])
+    names.append(CHANNELS_JSON)
+    names.extend(exports)
+    if compress:
+        names.extend([name + ".gz" for name in names])
+    return names
@@ -0,0 +1,40 @@
+from benchmark import compare_results, run_benchmarks, synthetic_catalog
+
+def results(seconds, best_seconds, peak_bytes=1000):
+    return {"results": {"1000": {"stage": {
+        "seconds": seconds, "best_seconds": best_seconds, "peak_bytes": peak_bytes, "bytes": 1,
+    }}}}
+
+def test_synthetic_catalog():
+    catalog = synthetic_catalog(500, seed=1)
+    assert len(catalog) == 500
+    assert len(catalog.hd) + len(catalog.sd) == 500
+    assert [channel.id for channel in synthetic_catalog(500, seed=1)] == [channel.id for channel in catalog]
+
+def test_noise_is_not_a_regression():
+    baseline = results(0.100, 0.090)
+    # A slow median alone is noise while the fastest run is still on par
+    assert compare_results(baseline, results(0.150, 0.105)) == []
+
+def test_slowdown_is_a_regression():
+    baseline = results(0.100, 0.090)
+    assert compare_results(baseline, results(0.150, 0.130)) == [("1000", "stage", "seconds", 0.100, 0.130)]
+
+def test_small_absolute_slowdowns_are_ignored():
+    baseline = results(0.001, 0.001)
+    assert compare_results(baseline, results(0.004, 0.003)) == []
+    assert compare_results(baseline, results(0.004, 0.003), min_seconds=0.001) != []
+
+def test_memory_growth_is_a_regression():
+    baseline = results(0.1, 0.1, peak_bytes=1000)
+    assert compare_results(baseline, results(0.1, 0.1, peak_bytes=1200)) == [
+        ("1000", "stage", "peak_bytes", 1000, 1200)
+    ]
+
+def test_run_benchmarks(capsys):
+    current = run_benchmarks([200], ["complete_playlist", "render_playlists"], repeat=3)
+    for result in current["results"]["200"].values():
+        assert result["best_seconds"] <= result["seconds"]
+        assert result["bytes"] > 0
+        assert result["peak_bytes"] > 0
+    assert compare_results(current, current) == []
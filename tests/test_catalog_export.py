@@ -0,0 +1,92 @@
+import gzip
+import json
+
+import pytest
+
+from catalog_export import (
+    COLUMNAR_FILE,
+    EXPORT_FORMATS,
+    JSONL_FILE,
+    load_exported_catalog,
+    parse_formats,
+    read_columns,
+    write_export,
+)
+from tata_sky_core import ChannelCatalog, default_channels, load_catalog
+
+@pytest.fixture(scope="module")
+def catalog():
+    channels = default_channels()
+    # Exercise a missing EPG number and non-ASCII text
+    channels[0] = dict(channels[0], epg=None, name="Star Plus हिंदी")
+    return ChannelCatalog(channels)
+
+@pytest.mark.parametrize("export_format", list(EXPORT_FORMATS))
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(catalog, tmp_path, export_format, compress):
+    path = str(tmp_path / EXPORT_FORMATS[export_format])
+    written, digest = write_export(path, catalog, export_format, compress)
+    assert written
+    loaded = load_exported_catalog(path + ".gz" if compress else path)
+    assert loaded.to_dicts() == catalog.to_dicts()
+    if compress:
+        with open(path, "rb") as f, gzip.open(path + ".gz", "rb") as g:
+            assert g.read() == f.read()
+    
+    # Unchanged content is not rewritten
+    assert write_export(path, catalog, export_format, compress, digest) == (False, digest)
+
+@pytest.mark.parametrize("export_format", list(EXPORT_FORMATS))
+def test_dicts_and_records_export_identically(catalog, tmp_path, export_format):
+    records = str(tmp_path / f"records-{EXPORT_FORMATS[export_format]}")
+    dicts = str(tmp_path / f"dicts-{EXPORT_FORMATS[export_format]}")
+    write_export(records, catalog, export_format)
+    write_export(dicts, catalog.to_dicts(), export_format)
+    with open(records, "rb") as f, open(dicts, "rb") as g:
+        assert f.read() == g.read()
+
+def test_jsonl_is_one_compact_object_per_line(catalog, tmp_path):
+    path = str(tmp_path / JSONL_FILE)
+    write_export(path, catalog, "jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == len(catalog)
+    assert json.loads(lines[1]) == catalog[1].to_dict()
+    assert ", " not in lines[1]
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_column_subset(catalog, tmp_path, compress):
+    path = str(tmp_path / COLUMNAR_FILE)
+    write_export(path, catalog, "columnar", compress)
+    columns = read_columns(path + ".gz" if compress else path, ["epg", "group", "hd"])
+    assert sorted(columns) == ["epg", "group", "hd"]
+    assert columns["epg"] == [channel.epg for channel in catalog]
+    assert columns["group"] == [channel.group for channel in catalog]
+    assert columns["hd"] == [channel.hd for channel in catalog]
+    
+    with pytest.raises(ValueError):
+        read_columns(path, ["name", "colour"])
+
+def test_columnar_header(catalog, tmp_path):
+    path = str(tmp_path / COLUMNAR_FILE)
+    write_export(path, catalog, "columnar")
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    assert header["count"] == len(catalog)
+    assert header["groups"] == catalog.groups()
+    
+    other = tmp_path / "other.columns.json"
+    other.write_text('{"format": "something-else", "version": 1}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_columns(str(other))
+
+def test_load_catalog_dispatches_on_suffix(catalog, tmp_path):
+    for export_format, filename in EXPORT_FORMATS.items():
+        path = str(tmp_path / filename)
+        write_export(path, catalog, export_format, compress=True)
+        assert load_catalog(path + ".gz").to_dicts() == catalog.to_dicts()
+
+def test_parse_formats():
+    assert parse_formats("jsonl, columnar") == ["jsonl", "columnar"]
+    with pytest.raises(ValueError):
+        parse_formats("jsonl,parquet")
@@ -0,0 +1,74 @@
+import pytest
+
+from channel_query import QuerySyntaxError, compile_query, parse_epg_value, query_channels, query_positions
+from playlist_server import PlaylistService, QueryError
+from tata_sky_core import ChannelCatalog, default_channels, select_channels
+
+@pytest.fixture(scope="module")
+def catalog():
+    return ChannelCatalog(default_channels())
+
+def ids(catalog, predicate):
+    return [channel.id for channel in catalog if predicate(channel)]
+
+@pytest.mark.parametrize("query, predicate", [
+    ("hd", lambda channel: channel.hd),
+    ("sd", lambda channel: not channel.hd),
+    ("group:sports and hd", lambda channel: channel.group == "Sports" and channel.hd),
+    ("group:Regional* and not group:\"Regional Tamil\"",
+     lambda channel: channel.group.startswith("Regional") and channel.group != "Regional Tamil"),
+    ("(group:News or group:Kids) and sd", lambda channel: channel.group in ("News", "Kids") and not channel.hd),
+    ('name:"star sports"*', lambda channel: channel.name.lower().startswith("star sports")),
+    ("id:colors_hd or name:\"Zee TV\"", lambda channel: channel.id == "colors_hd" or channel.name == "Zee TV"),
+    ("epg:298..310", lambda channel: channel.epg is not None and 298 <= channel.epg <= 310),
+    ("epg:200-299", lambda channel: channel.epg is not None and 200 <= channel.epg <= 299),
+    ("epg:900..", lambda channel: channel.epg is not None and channel.epg >= 900),
+    ("epg:..120", lambda channel: channel.epg is not None and channel.epg <= 120),
+    ("epg:900-", lambda channel: channel.epg is not None and channel.epg >= 900),
+    ("not epg:0..", lambda channel: channel.epg is None or channel.epg < 0),
+])
+def test_query_matches_brute_force(catalog, query, predicate):
+    expected = ids(catalog, predicate)
+    assert expected or query.startswith("not")
+    assert [channel.id for channel in query_channels(catalog, query)] == expected
+
+def test_positions_are_in_catalog_order(catalog):
+    positions = query_positions(catalog, "group:Movies or group:News")
+    assert positions == sorted(positions)
+
+@pytest.mark.parametrize("value, expected", [
+    ("300", (300, 300)),
+    ("300..310", (300, 310)),
+    ("300-310", (300, 310)),
+    ("300..", (300, float("inf"))),
+    ("..310", (float("-inf"), 310)),
+])
+def test_parse_epg_value(value, expected):
+    assert parse_epg_value(value) == expected
+
+@pytest.mark.parametrize("query", [
+    "", "group:", "group:Sports and", "(hd", "hd)", "foo", "colour:red",
+    "id:abc*", "epg:abc", "epg:..", "epg:-", "epg:310..300",
+])
+def test_syntax_errors(query):
+    with pytest.raises(QuerySyntaxError):
+        compile_query(query)
+
+def test_server_epg_ranges(catalog):
+    service = PlaylistService(catalog)
+    body = service.get("/playlist.m3u", "epg=900-").body.decode("utf-8")
+    assert body.count("#EXTINF") == len(ids(catalog, lambda channel: (channel.epg or 0) >= 900)) + 1
+    with pytest.raises(QueryError):
+        service.get("/playlist.m3u", "epg=-")
+
+def test_select_channels_by_epg_ranges(catalog):
+    ranges = [(200, 299), (250, 320), (float("-inf"), 120)]
+    expected = [
+        position for position, channel in enumerate(catalog)
+        if channel.epg is not None and any(low <= channel.epg <= high for low, high in ranges)
+    ]
+    assert select_channels(catalog, epg_ranges=ranges) == expected
+    assert select_channels(catalog, epg_ranges=ranges, hd=True) == [
+        position for position in expected if catalog[position].hd
+    ]
+    assert select_channels(catalog, epg_ranges=[(100000, float("inf"))]) == []
@@ -0,0 +1,75 @@
+import calendar
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from epg_index import build_epg_index, parse_xmltv_time
+
+GUIDE = """<?xml version="1.0" encoding="UTF-8"?>
+<tv generator-info-name="test">
+  <channel id="starplus"><display-name>Star Plus</display-name></channel>
+  <channel id="other"><display-name>Other</display-name></channel>
+  <programme start="20250101120000 +0000" stop="20250101130000 +0000" channel="starplus"><title>Noon</title></programme>
+  <programme start="20250101100000 +0000" stop="20250101110000 +0000" channel="starplus"><title>Morning</title></programme>
+  <programme start="20250101110000 +0000" stop="20250101120000 +0000" channel="starplus"><title>Late Morning</title></programme>
+  <programme stop="20250101140000 +0000" channel="starplus"><title>No Start</title></programme>
+  <programme start="soon" channel="starplus"><title>Bad Start</title></programme>
+  <programme start="20250101100000 +0000" stop="20250101110000 +0000" channel="other"><title>Elsewhere</title></programme>
+</tv>
+"""
+
+def utc(*fields):
+    return calendar.timegm(fields + (0,) * (6 - len(fields)))
+
+@pytest.fixture
+def guide(tmp_path):
+    path = tmp_path / "guide.xml"
+    path.write_text(GUIDE, encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("value, expected", [
+    ("20251224013000 +0000", utc(2025, 12, 24, 1, 30)),
+    ("20251224013000 +0530", utc(2025, 12, 23, 20, 0)),
+    ("20251224013000 -0100", utc(2025, 12, 24, 2, 30)),
+    ("20251224013000", utc(2025, 12, 24, 1, 30)),
+    ("202512240130 +0530", utc(2025, 12, 23, 20, 0)),
+])
+def test_parse_xmltv_time(value, expected):
+    assert parse_xmltv_time(value) == expected
+
+@pytest.mark.parametrize("value", ["", "soon", "2025-12-24"])
+def test_parse_xmltv_time_rejects_garbage(value):
+    with pytest.raises(ValueError):
+        parse_xmltv_time(value)
+
+def test_programmes_are_sorted_and_malformed_ones_skipped(guide):
+    index = build_epg_index(guide, ["starplus"])
+    assert len(index) == 3
+    assert index.skipped == 2
+    assert index.schedules["starplus"].titles == ["Morning", "Late Morning", "Noon"]
+    assert index.channel_names == {"starplus": "Star Plus"}
+
+def test_now_next_boundaries(guide):
+    index = build_epg_index(guide, ["starplus"])
+    
+    def titles(when):
+        return tuple(programme and programme.title for programme in index.now_next("starplus", when))
+    
+    assert titles(utc(2025, 1, 1, 9)) == (None, "Morning")
+    assert titles(utc(2025, 1, 1, 10)) == ("Morning", "Late Morning")
+    # A programme's stop is exclusive; the next one starts at the same second
+    assert titles(utc(2025, 1, 1, 11)) == ("Late Morning", "Noon")
+    assert titles(utc(2025, 1, 1, 12, 59, 59)) == ("Noon", None)
+    assert titles(utc(2025, 1, 1, 13)) == (None, None)
+    assert index.now_next("unknown", utc(2025, 1, 1, 10)) == (None, None)
+
+def test_trimmed_output(guide, tmp_path):
+    output = str(tmp_path / "trimmed.xml")
+    build_epg_index(guide, ["starplus"], output)
+    root = ET.parse(output).getroot()
+    assert root.get("generator-info-name") == "test"
+    assert [channel.get("id") for channel in root.iter("channel")] == ["starplus"]
+    assert [programme.findtext("title") for programme in root.iter("programme")] == [
+        "Noon", "Morning", "Late Morning",
+    ]
+    assert {programme.get("channel") for programme in root.iter("programme")} == {"starplus"}
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from generate_tata_sky_m3u import main
+from tata_sky_core import CHANNELS_JSON, MANIFEST_FILE, default_channels, output_filenames
+
+PLAYLISTS = [name for name in output_filenames() if name != CHANNELS_JSON]
+
+def read(directory, filename):
+    with open(os.path.join(directory, filename), "rb") as f:
+        return f.read()
+
+@pytest.fixture
+def expected(tmp_path):
+    directory = tmp_path / "expected"
+    main(["-o", str(directory)])
+    return {filename: read(directory, filename) for filename in PLAYLISTS}
+
+@pytest.fixture
+def small_catalog(tmp_path):
+    path = tmp_path / "small.json"
+    path.write_text(json.dumps(default_channels()[:20]), encoding="utf-8")
+    return str(path)
+
+def test_unchanged_catalog_is_skipped(tmp_path, capsys):
+    directory = str(tmp_path / "out")
+    main(["--incremental", "-o", directory])
+    capsys.readouterr()
+    main(["--incremental", "-o", directory])
+    assert "nothing to regenerate" in capsys.readouterr().out
+
+def test_plain_run_updates_manifest(tmp_path, expected, small_catalog, capsys):
+    directory = str(tmp_path / "out")
+    main(["--incremental", "-o", directory])
+    main(["--catalog", small_catalog, "-o", directory])
+    capsys.readouterr()
+    main(["--incremental", "-o", directory])
+    assert "nothing to regenerate" not in capsys.readouterr().out
+    for filename in PLAYLISTS:
+        assert read(directory, filename) == expected[filename]
+
+def test_edited_output_is_repaired(tmp_path, expected, capsys):
+    directory = str(tmp_path / "out")
+    main(["--incremental", "-o", directory])
+    with open(os.path.join(directory, PLAYLISTS[1]), "ab") as f:
+        f.write(b"edited by hand\n")
+    capsys.readouterr()
+    main(["--incremental", "-o", directory])
+    output = capsys.readouterr().out
+    assert "nothing to regenerate" not in output
+    assert f"Unchanged: {os.path.join(directory, PLAYLISTS[0])}" in output
+    for filename in PLAYLISTS:
+        assert read(directory, filename) == expected[filename]
+
+def test_manifest_records_every_output(tmp_path):
+    directory = str(tmp_path / "out")
+    main(["-o", directory])
+    with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert sorted(manifest["files"]) == sorted(output_filenames())
@@ -0,0 +1,126 @@
+import json
+import os
+import pathlib
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from generate_tata_sky_m3u import main
+from logo_cache import INDEX_FILE, LogoCache, mirror_logos
+from tata_sky_core import ChannelCatalog
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"logo" * 64
+
+class LogoHandler(BaseHTTPRequestHandler):
+    """Serves two identical logos (one with an ETag) and a 404."""
+    
+    requests_seen = []
+    
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/a.png":
+            if self.headers.get("If-None-Match") == '"a1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"a1"')
+        elif self.path == "/b":
+            self.send_response(200)
+        else:
+            self.send_error(404)
+            return
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(PNG)))
+        self.end_headers()
+        self.wfile.write(PNG)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), LogoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    LogoHandler.requests_seen = []
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def make_catalog(base):
+    return ChannelCatalog([
+        {"name": "A", "id": "a", "logo": f"{base}/a.png", "group": "Test", "hd": False, "epg": 1},
+        {"name": "B", "id": "b", "logo": f"{base}/b", "group": "Test", "hd": True, "epg": 2},
+        {"name": "C", "id": "c", "logo": f"{base}/missing.png", "group": "Test", "hd": False, "epg": 3},
+    ])
+
+def test_mirror(server, tmp_path, capsys):
+    directory = str(tmp_path / "logos")
+    catalog = make_catalog(server)
+    counts = mirror_logos(catalog, directory, workers=4, relative_to=str(tmp_path))
+    assert counts == {"fetched": 2, "unchanged": 0, "not-modified": 0, "failed": 1}
+    
+    # Identical bodies are stored once, under their content hash
+    a, b, c = catalog
+    assert a.logo == b.logo
+    assert a.logo.startswith("logos/") and a.logo.endswith(".png")
+    with open(tmp_path / a.logo, "rb") as f:
+        assert f.read() == PNG
+    
+    # Failed logos keep their original URL
+    assert c.logo == f"{server}/missing.png"
+    assert "Logo failed" in capsys.readouterr().out
+    
+    with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    assert sorted(index) == [f"{server}/a.png", f"{server}/b"]
+
+def test_second_run_revalidates(server, tmp_path):
+    directory = str(tmp_path / "logos")
+    mirror_logos(make_catalog(server), directory, workers=4)
+    LogoHandler.requests_seen = []
+    counts = mirror_logos(make_catalog(server), directory, workers=4)
+    assert counts == {"fetched": 0, "unchanged": 1, "not-modified": 1, "failed": 1}
+    assert ("/a.png", '"a1"') in LogoHandler.requests_seen
+
+def test_local_url_with_base_url(server, tmp_path):
+    directory = str(tmp_path / "logos")
+    catalog = make_catalog(server)
+    mirror_logos(catalog, directory, base_url="https://cdn.example.com/logos/", workers=4)
+    record = LogoCache(directory).index[f"{server}/a.png"]
+    assert catalog[0].logo == f"https://cdn.example.com/logos/{record['path']}"
+    
+    # Without a base URL or playlist directory: an absolute file URL
+    path = os.path.join(directory, *record["path"].split("/"))
+    assert LogoCache(directory).local_url(f"{server}/a.png") == pathlib.Path(path).as_uri()
+
+@pytest.mark.parametrize("base_url", [None, "https://cdn.example.com/logos"])
+def test_playlist_logos_are_rewritten(server, tmp_path, monkeypatch, base_url):
+    # Relative paths, as in "-o public --mirror-logos public/logos"
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "catalog.json").write_text(json.dumps(make_catalog(server).to_dicts()), encoding="utf-8")
+    (tmp_path / "profiles.json").write_text(json.dumps([{"name": "hd", "hd": True}]), encoding="utf-8")
+    argv = ["--catalog", "catalog.json", "--mirror-logos", "public/logos", "-o", "public",
+            "--profiles", "profiles.json", "--jobs", "1"]
+    if base_url:
+        argv += ["--logo-base-url", base_url]
+    main(argv)
+    
+    record = LogoCache("public/logos").index[f"{server}/a.png"]
+    expected = f"{base_url}/{record['path']}" if base_url else f"logos/{record['path']}"
+    with open(os.path.join("public", "tata_sky_playlist.m3u"), "r", encoding="utf-8") as f:
+        playlist = f.read()
+    assert playlist.count(f'tvg-logo="{expected}"') == 2
+    assert f'tvg-logo="{server}/missing.png"' in playlist
+    
+    # Profile playlists live in public/profiles/<name>/
+    expected = f"{base_url}/{record['path']}" if base_url else f"../../logos/{record['path']}"
+    with open(os.path.join("public", "profiles", "hd", "tata_sky_playlist.m3u"), "r", encoding="utf-8") as f:
+        playlist = f.read()
+    assert playlist.count(f'tvg-logo="{expected}"') == 1
+    if not base_url:
+        assert os.path.isfile(os.path.join("public", "profiles", "hd", *expected.split("/")))
@@ -0,0 +1,76 @@
+from tata_sky_core import (
+    ChannelCatalog,
+    create_m3u_header,
+    default_channels,
+    iter_categories_playlist,
+    iter_channel_entries,
+    iter_complete_playlist,
+    write_playlist,
+)
+from m3u_parser import diff_playlists, iter_m3u, merge_playlists
+
+def write(path, channels, title="Test Playlist"):
+    write_playlist(str(path), [create_m3u_header(title)] + list(iter_channel_entries(channels)))
+    return str(path)
+
+def test_entries_keep_attributes(tmp_path):
+    catalog = ChannelCatalog(default_channels()[:3])
+    entries = list(iter_m3u(write(tmp_path / "a.m3u", catalog)))
+    channel = catalog[0]
+    entry = entries[-3]
+    assert entry.tvg_id == channel.id
+    assert entry.group_title == channel.group
+    assert entry.tvg_chno == str(channel.epg)
+    assert len(entry.options) == 2
+
+def test_diff(tmp_path):
+    channels = default_channels()
+    old = write(tmp_path / "old.m3u", ChannelCatalog(channels[:10]))
+    changed = dict(channels[1], logo="https://example.com/new.png")
+    new = write(tmp_path / "new.m3u", ChannelCatalog([channels[0], changed] + channels[2:9] + [channels[20]]))
+    result = diff_playlists(old, new)
+    assert result["added"] == [channels[20]["id"]]
+    assert result["removed"] == [channels[9]["id"]]
+    assert result["changed"] == [channels[1]["id"]]
+
+def test_merge_into_an_input(tmp_path):
+    channels = default_channels()
+    first = write(tmp_path / "first.m3u", ChannelCatalog(channels[:10]))
+    second = write(tmp_path / "second.m3u", ChannelCatalog(channels[5:20]))
+    assert merge_playlists([first, second], first) == 20
+    keys = [entry.key for entry in iter_m3u(first)]
+    assert keys == [channel["id"] for channel in channels[:20]]
+
+def test_info_and_category_headers_are_skipped(tmp_path):
+    catalog = ChannelCatalog(default_channels())
+    complete = str(tmp_path / "complete.m3u")
+    categories = str(tmp_path / "categories.m3u")
+    write_playlist(complete, iter_complete_playlist(catalog))
+    write_playlist(categories, iter_categories_playlist(catalog))
+    assert [entry.tvg_id for entry in iter_m3u(complete)] == [channel.id for channel in catalog]
+    assert diff_playlists(complete, categories) == {"added": [], "removed": [], "changed": []}
+    
+    everything = diff_playlists(complete, categories, channels_only=False)
+    assert everything["removed"] == ["name:Tata Sky Complete Playlist"]
+    assert len(everything["added"]) == len(catalog.groups()) + 1
+
+def test_merge_with_a_third_party_playlist(tmp_path):
+    channels = default_channels()
+    ours = write(tmp_path / "ours.m3u", ChannelCatalog(channels[:3]))
+    other = tmp_path / "other.m3u"
+    other.write_text(
+        "#EXTM3U\n"
+        "#EXTINF:-1,BBC One\n"
+        "http://example.com/bbc1.m3u8\n"
+        "#EXTINF:-1 group-title=\"UK\",BBC Two\n"
+        "http://example.com/bbc2.m3u8\n",
+        encoding="utf-8",
+    )
+    merged = str(tmp_path / "merged.m3u")
+    assert merge_playlists([ours, str(other)], merged) == 5
+    keys = [entry.key for entry in iter_m3u(merged)]
+    assert keys == [channel["id"] for channel in channels[:3]] + ["name:BBC One", "name:BBC Two"]
+    assert [entry.url for entry in iter_m3u(merged)][-1] == "http://example.com/bbc2.m3u8"
+    
+    result = diff_playlists(ours, str(other))
+    assert result["added"] == ["name:BBC One", "name:BBC Two"]
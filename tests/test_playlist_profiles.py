@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+from generate_tata_sky_m3u import main
+from playlist_profiles import generate_profiles, load_profiles, profile_positions
+from tata_sky_core import CHANNELS_JSON, ChannelCatalog, default_channels, output_filenames
+
+PROFILES = [
+    {"name": "sports_hd", "groups": ["Sports"], "hd": True},
+    {"name": "news_pack", "epg": [[200, 299]]},
+    {"name": "no_tamil", "exclude_groups": ["Regional Tamil"], "hd": False},
+    {"name": "starter", "ids": ["starplus", "colors", "starplus", "aajtak"]},
+    {"name": "sports_prime", "query": "group:Sports and epg:..400", "hd": True},
+]
+
+@pytest.fixture(scope="module")
+def catalog():
+    return ChannelCatalog(default_channels())
+
+def write_config(tmp_path, profiles):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"profiles": profiles}), encoding="utf-8")
+    return str(path)
+
+def selected_ids(catalog, profile):
+    return [catalog[position].id for position in profile_positions(catalog, profile)]
+
+def test_profile_selection(catalog):
+    def matching(predicate):
+        return [channel.id for channel in catalog if predicate(channel)]
+    
+    assert selected_ids(catalog, PROFILES[0]) == matching(lambda channel: channel.group == "Sports" and channel.hd)
+    assert selected_ids(catalog, PROFILES[1]) == matching(lambda channel: 200 <= (channel.epg or 0) <= 299)
+    assert selected_ids(catalog, {"name": "single", "epg": [200, 299]}) == selected_ids(catalog, PROFILES[1])
+    assert selected_ids(catalog, PROFILES[2]) == matching(
+        lambda channel: channel.group != "Regional Tamil" and not channel.hd)
+    assert selected_ids(catalog, PROFILES[4]) == matching(
+        lambda channel: channel.group == "Sports" and channel.hd and (channel.epg or 0) <= 400)
+
+def test_repeated_ids_are_selected_once(catalog, tmp_path):
+    assert selected_ids(catalog, PROFILES[3]) == ["starplus", "colors", "aajtak"]
+    results = generate_profiles(catalog, [PROFILES[3]], str(tmp_path), jobs=1)
+    assert results["starter"]["total_channels"] == 3
+
+@pytest.mark.parametrize("profile", [
+    {"name": "bad", "groups": "Sports"},
+    {"name": "bad", "exclude_groups": [1, 2]},
+    {"name": "bad", "ids": "starplus"},
+    {"name": "bad", "hd": "false"},
+    {"name": "bad", "epg": 200},
+    {"name": "bad", "epg": [300, 200]},
+    {"name": "bad", "epg": [[200, "299"]]},
+    {"name": "bad", "query": "group:"},
+    {"name": "bad", "query": 1},
+    {"name": "bad", "colour": "red"},
+    {"name": "../bad"},
+    {"groups": ["Sports"]},
+    "sports",
+])
+def test_bad_configs(tmp_path, profile):
+    with pytest.raises(ValueError):
+        load_profiles(write_config(tmp_path, [profile]))
+
+def test_bad_config_fails_before_writing(tmp_path, capsys):
+    config = write_config(tmp_path, [{"name": "bad", "groups": "Sports"}])
+    directory = tmp_path / "out"
+    with pytest.raises(SystemExit):
+        main(["-o", str(directory), "--profiles", config])
+    assert "groups must be a list of strings" in capsys.readouterr().err
+    assert not directory.exists()
+
+def read_output(directory, filename):
+    with open(os.path.join(directory, filename), "rb") as f:
+        data = f.read()
+    if filename == CHANNELS_JSON:
+        # Drop the generation timestamp
+        data = json.loads(data)
+        data.pop("generated_at")
+    return data
+
+def test_process_pool_matches_serial_build(catalog, tmp_path):
+    serial = generate_profiles(catalog, PROFILES, str(tmp_path / "serial"), jobs=1)
+    parallel = generate_profiles(catalog, PROFILES, str(tmp_path / "parallel"), jobs=2)
+    assert parallel == serial
+    assert list(parallel) == [profile["name"] for profile in PROFILES]
+    for profile in PROFILES:
+        for filename in output_filenames():
+            assert (read_output(tmp_path / "parallel" / profile["name"], filename)
+                    == read_output(tmp_path / "serial" / profile["name"], filename))
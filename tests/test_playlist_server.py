@@ -0,0 +1,58 @@
+import gzip
+
+import pytest
+
+from tata_sky_core import ChannelCatalog, default_channels
+from playlist_server import PlaylistService, QueryError, accepts_gzip
+
+@pytest.fixture(scope="module")
+def catalog():
+    return ChannelCatalog(default_channels())
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("deflate;q=1.0, GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, deflate", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("identity", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+def test_filters(catalog):
+    service = PlaylistService(catalog)
+    body = service.get("/playlist.m3u", "group=Sports&hd=1").body.decode("utf-8")
+    expected = [channel.id for channel in catalog if channel.group == "Sports" and channel.hd]
+    assert body.count("#EXTINF") == len(expected) + 1
+    for channel_id in expected:
+        assert f'tvg-id="{channel_id}"' in body
+    with pytest.raises(QueryError):
+        service.get("/playlist.m3u", "hd=maybe")
+
+def test_cache_is_bounded_by_bytes(catalog):
+    full_size = len(PlaylistService(catalog).get("/playlist.m3u", "").body)
+    service = PlaylistService(catalog, cache_bytes=full_size * 2)
+    first = service.get("/playlist.m3u", "")
+    assert service.get("/playlist.m3u", "") is first
+    assert service.cached_bytes == full_size
+    
+    # The gzip body counts towards the limit too
+    assert gzip.decompress(service.gzip_body(first)) == first.body
+    assert service.cached_bytes == full_size + len(first.gzip_body)
+    
+    service.get("/categories.m3u", "")
+    assert service.cached_bytes <= service.cache_bytes
+    assert service.get("/playlist.m3u", "") is not first
+    assert service.cached_bytes == sum(response.size for response in service._cache.values())
+
+def test_oversized_responses_are_not_cached(catalog):
+    service = PlaylistService(catalog, cache_bytes=1000)
+    first = service.get("/playlist.m3u", "")
+    assert service.get("/playlist.m3u", "") is not first
+    assert service.cached_bytes == 0
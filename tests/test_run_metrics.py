@@ -0,0 +1,54 @@
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from generate_tata_sky_m3u import METRICS_FILE, main, parse_args
+from run_metrics import RunMetrics, format_stage_table
+from tata_sky_core import AtomicOutput
+
+def test_memory_is_not_traced_by_default():
+    metrics = RunMetrics()
+    with metrics.stage("work"):
+        [0] * 1000
+    metrics.stop()
+    assert not tracemalloc.is_tracing()
+    assert metrics.stages[0].peak_bytes is None
+    assert metrics.to_dict()["timing_overhead"] == []
+    assert "overhead" not in format_stage_table(metrics)
+
+def test_traced_memory_is_flagged_as_overhead():
+    metrics = RunMetrics(trace_allocations=True)
+    with metrics.stage("outer"):
+        with metrics.stage("inner"):
+            data = [0] * 100000
+    metrics.stop()
+    del data
+    outer, inner = metrics.stages
+    assert inner.peak_bytes >= 800000
+    assert outer.peak_bytes >= inner.peak_bytes
+    assert metrics.to_dict()["timing_overhead"] == ["tracemalloc"]
+    assert "Timings include tracemalloc overhead." in format_stage_table(metrics)
+
+def test_gzip_copies_count_as_written(tmp_path):
+    before = AtomicOutput.total_bytes_written
+    output = AtomicOutput(str(tmp_path / "a.txt"), compress=True)
+    output.write(b"x" * 10000)
+    output.commit()
+    compressed = os.path.getsize(tmp_path / "a.txt.gz")
+    assert output.compressed_bytes == compressed
+    assert AtomicOutput.total_bytes_written - before == 10000 + compressed
+
+def test_metrics_option(tmp_path):
+    directory = str(tmp_path)
+    main(["--metrics", "--prometheus", "-o", directory])
+    with open(os.path.join(directory, METRICS_FILE), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    stages = {stage["name"]: stage for stage in data["stages"]}
+    assert stages["render_playlists"]["bytes_written"] > 0
+    assert stages["render_playlists"]["peak_bytes"] is None
+
+def test_profile_is_not_an_abbreviation_of_profiles():
+    with pytest.raises(SystemExit):
+        parse_args(["--profile"])